@@ -1,28 +1,66 @@
-import uuid
-from typing import List, Dict, Any, Tuple
+import os
+from typing import List, Dict, Any, Optional, Tuple, Union
 
+import numpy as np
 from PIL import Image
 
 from misc.arg_parse import argdict, auto_cast
 
-import matplotlib.pyplot as plt
+
+# Field defaults shared by every generated tile, in GB Studio's key order
+_TILE_TEMPLATE = {
+    "_comment": "",
+    "id": "",
+    "x": 0,
+    "y": 0,
+    "sliceX": 0,
+    "sliceY": 0,
+    "palette": 0,
+    "flipX": False,
+    "flipY": False,
+    "objPalette": "OBP0",
+    "paletteIndex": 0,
+    "priority": False
+}
+
+
+# State type -> (animation count, flip left, clean state type)
+_STATE_INFO = {
+    'fixed': (1, False, 'fixed'),
+    'multi#f': (3, True, 'multi'),
+    'multi': (4, False, 'multi'),
+    'multi_movement#f': (6, True, 'multi_movement'),
+    'multi_movement': (8, False, 'multi_movement')
+}
 
 
 def show(image: Image.Image) -> None:
     """Display an image using matplotlib."""
+    import matplotlib.pyplot as plt  # Debug-only, kept out of module import time
     plt.imshow(image)
     plt.show()
 
 
-def _is_empty(image: Image.Image, left: int, upper: int, right: int, lower: int) -> bool:
-    """Check if a region of the image is empty (all green pixels)."""
+def _rgb_pixels(image: Image.Image) -> np.ndarray:
+    """Get the pixels of an image as an (height, width, 3) uint8 RGB array."""
+    return np.asarray(image if image.mode == 'RGB' else image.convert('RGB'))
+
+
+def _green_mask(pixels: np.ndarray) -> np.ndarray:
+    """Build a boolean (height, width) mask marking the green (0, 255, 0) pixels of an RGB pixel array."""
+    green_mask: np.ndarray = (pixels[..., 0] == 0) & (pixels[..., 1] == 255) & (pixels[..., 2] == 0)
+    return green_mask
+
+
+def _is_empty(green_mask: np.ndarray, left: int, upper: int, right: int, lower: int) -> bool:
+    """Check if a region of the image is empty (all green pixels) using its precomputed green mask."""
     if left >= right or upper >= lower:
         return True
-    try:
-        cropped = image.crop((left, upper, right, lower))
-        return all(px == (0, 255, 0) for px in cropped.getdata())
-    except (ValueError, OSError):
-        return True
+    height, width = green_mask.shape
+    if left < 0 or upper < 0 or right > width or lower > height:
+        # Regions reaching past the image border are padded with black, so they are never empty
+        return False
+    return bool(green_mask[upper:lower, left:right].all())
 
 
 def interleave(image: Image.Image, tile_height: int, vert_tiles_per_frame: int) -> Image.Image:
@@ -44,7 +82,8 @@ def interleave(image: Image.Image, tile_height: int, vert_tiles_per_frame: int)
     Returns:
     --------
     Image.Image
-        A new PIL Image with rows interleaved in ABAB pattern
+        A new PIL Image with rows interleaved in ABAB pattern, or the input image
+        itself when there are fewer than two complete rows
 
     Example:
     --------
@@ -69,13 +108,16 @@ def interleave(image: Image.Image, tile_height: int, vert_tiles_per_frame: int)
     # Calculate the height of each row to process
     row_height = tile_height * vert_tiles_per_frame
 
-    # Get image dimensions
-    width, height = image.size
-    
-    if height < row_height * 2:
+    total_rows = _interleaved_row_count(image.height, row_height)
+    if not total_rows:
         # Not enough rows to interleave, return original image
-        return image.copy()
+        return image
+
+    return Image.fromarray(_interleave_array(_rgb_pixels(image), row_height, total_rows))
+
 
+def _interleaved_row_count(height: int, row_height: int) -> int:
+    """Count the complete rows that take part in interleaving, or 0 if there are not enough rows."""
     # Calculate total number of complete rows
     total_rows = height // row_height
 
@@ -83,49 +125,29 @@ def interleave(image: Image.Image, tile_height: int, vert_tiles_per_frame: int)
     if total_rows % 2 != 0:
         total_rows -= 1  # Discard last row if odd number
 
-    if total_rows < 2:
-        # Not enough rows to interleave, return original image
-        return image.copy()
+    return total_rows if total_rows >= 2 else 0
+
+
+def _interleave_array(pixels: np.ndarray, row_height: int, total_rows: int) -> np.ndarray:
+    """Interleave the first `total_rows` rows of an RGB pixel array, see `interleave`."""
+    height, width = pixels.shape[:2]
 
     # Calculate n - number of rows in each group (A and B)
     n = total_rows // 2
 
-    # Split rows into A section (first n rows) and B section (next n rows)
-    a_rows = []
-    b_rows = []
-
-    # Extract A rows (first n rows)
-    for i in range(n):
-        y_start = i * row_height
-        y_end = y_start + row_height
-        row = image.crop((0, y_start, width, y_end))
-        a_rows.append(row)
-
-    # Extract B rows (next n rows)
-    for i in range(n, total_rows):
-        y_start = i * row_height
-        y_end = y_start + row_height
-        row = image.crop((0, y_start, width, y_end))
-        b_rows.append(row)
-
-    # Create a new image for the result
-    result = Image.new('RGB', (width, height))
-
-    # Interleave the rows: A0, B0, A1, B1, A2, B2, ..., A(n-1), B(n-1)
-    result_y = 0
-    for i in range(n):
-        # Paste A row
-        result.paste(a_rows[i], (0, result_y))
-        result_y += row_height
-
-        # Paste B row
-        result.paste(b_rows[i], (0, result_y))
-        result_y += row_height
+    # View the A section (first n rows) and B section (next n rows) as axis 0 of a
+    # (2, n, row_height, width, 3) array, then swap the first two axes to interleave
+    # the rows: A0, B0, A1, B1, A2, B2, ..., A(n-1), B(n-1)
+    sections = pixels[:total_rows * row_height].reshape(2, n, row_height, width, 3)
+
+    # Create a new array for the result; discarded partial rows stay black
+    result = np.zeros((height, width, 3), dtype=np.uint8)
+    result[:total_rows * row_height] = sections.transpose(1, 0, 2, 3, 4).reshape(-1, width, 3)
 
     return result
 
 
-def process(image: Image.Image, params: str = "") -> Image.Image:
+def process(image: Image.Image, params: Union[str, Dict[str, Any]] = "", pixels: Optional[np.ndarray] = None) -> Image.Image:
     """
     Process an image for GB Studio animation generation.
     
@@ -135,7 +157,8 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
 
     Args:
         image: PIL Image to process
-        params: Parameter string for configuration
+        params: Parameter string for configuration, or a dict of already parsed parameters
+        pixels: Optional RGB pixel array of the image, to avoid converting it again
         
     Returns:
         Processed PIL Image with extra_data containing JSON metadata
@@ -145,18 +168,19 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
 
     # Basic configuration
     img_width, img_height = image.size
-    args = argdict(params)
+    # Parameter values are only known at run time, so they are typed where they are read
+    args: Dict[str, Any] = dict(params) if isinstance(params, dict) else argdict(params)
 
     # Parse parameters with defaults
-    fname = args.setdefault('fname', 'TBD')
+    fname: str = args.setdefault('fname', 'TBD')
     name = fname.split('\\')[-1][:-4] if fname != 'TBD' else 'unnamed_sprite'
-    checksum = args.setdefault('chksum', 'TBD')
-    tile_width = args.setdefault('twidth', 8)
-    tile_height = args.setdefault('theight', 16)
-    state_types = list((auto_cast(a.strip()) for a in str(args.setdefault('states', "fixed")).split(",")))
-    hor_tiles_per_frame = args.setdefault('htiles', 1)
-    vert_tiles_per_frame = args.setdefault('vtiles', 1)
-    layer_palettes = list((auto_cast(a.strip()) for a in str(args.setdefault('palettes', "1")).split(",")))
+    checksum: str = args.setdefault('chksum', 'TBD')
+    tile_width: int = args.setdefault('twidth', 8)
+    tile_height: int = args.setdefault('theight', 16)
+    state_types = _list_arg(args.setdefault('states', "fixed"))
+    hor_tiles_per_frame: int = args.setdefault('htiles', 1)
+    vert_tiles_per_frame: int = args.setdefault('vtiles', 1)
+    layer_palettes = _list_arg(args.setdefault('palettes', "1"))
     layer_count = len(layer_palettes)
 
     # Validate parameters
@@ -177,8 +201,23 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     # Calculate horizontal compensation
     h_compensation = 0 if hor_tiles_per_frame <= 2 else (hor_tiles_per_frame - 2) * -4
 
-    # Interleave the image
-    image = interleave(image, tile_height, vert_tiles_per_frame)
+    # Interleave the image, keeping its pixels as an array for the emptiness checks
+    row_height = tile_height * vert_tiles_per_frame
+    total_rows = _interleaved_row_count(img_height, row_height)
+    if total_rows:
+        if pixels is None:
+            pixels = _rgb_pixels(image)
+        pixels = _interleave_array(pixels, row_height, total_rows)
+        image = Image.fromarray(pixels)
+        green_mask = _green_mask(pixels)
+    else:
+        # Not enough rows to interleave; copy so extra_data is not attached to the caller's image
+        image = image.copy()
+        if image.mode == 'RGB':
+            green_mask = _green_mask(np.asarray(image) if pixels is None else pixels)
+        else:
+            # Only RGB pixels can compare equal to the green key colour
+            green_mask = np.zeros((img_height, img_width), dtype=bool)
 
     # Calculate maximum frames
     max_frames = img_width // (hor_tiles_per_frame * tile_width)
@@ -192,9 +231,7 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     # Process each state
     state_offset = 0
     for state_index, state_type in enumerate(state_types):
-        anim_count = _get_animation_count(state_type)
-        flip_left = '#f' in state_type
-        clean_state_type = state_type.replace('#f', "")
+        anim_count, flip_left, clean_state_type = _get_state_info(state_type)
 
         state = _create_state(state_index, clean_state_type, flip_left)
         
@@ -202,27 +239,35 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
         for animation_index in range(anim_count):
             animation = _create_animation()
             
+            # The tiles of a frame cover one rectangle: all layers and vertical tiles
+            # of this animation stacked below each other
+            frame_top = (state_offset + vert_tiles_per_frame * layer_count * animation_index) * tile_height
+            frame_bottom = frame_top + vert_tiles_per_frame * layer_count * tile_height
+            frame_width = hor_tiles_per_frame * tile_width
+            
+            # Tile positions only shift horizontally from frame to frame, so lay them out once
+            tile_layout = _create_tile_layout(frame_top, vert_tiles_per_frame, hor_tiles_per_frame,
+                                              layer_count, tile_width, tile_height, h_compensation)
+            
             # Process frames for this animation
             for frame_index in range(max_frames):
                 data['numFrames'] += 1
+                
+                # Check if frame is empty and break if so
+                frame_left = frame_index * frame_width
+                frame_right = frame_left + frame_width
+                if _is_empty(green_mask, frame_left, frame_top, frame_right, frame_bottom):
+                    break
+                
                 frame = _create_frame()
                 
                 # Process tiles for this frame
-                tiles = _create_frame_tiles(image, frame_index, state_offset, animation_index,
-                                          vert_tiles_per_frame, hor_tiles_per_frame, layer_count,
-                                          tile_width, tile_height, h_compensation, layer_palettes,
-                                          data['numTiles'], state_index)
+                tiles = _create_frame_tiles(tile_layout, frame_index, frame_left, animation_index,
+                                            layer_palettes, data['numTiles'], state_index)
                 
                 frame["tiles"] = tiles
-                
-                # Check if frame is empty and break if so
-                if all(_is_empty(image, tile["sliceX"], tile["sliceY"], 
-                               tile["sliceX"] + tile_width, tile["sliceY"] + tile_height) 
-                       for tile in frame["tiles"]):
-                    break
-                else:
-                    data['numTiles'] += len(tiles)
-                    animation["frames"].append(frame)
+                data['numTiles'] += len(tiles)
+                animation["frames"].append(frame)
 
             state["animations"].append(animation)
         
@@ -239,7 +284,7 @@ def _create_base_json_structure(name: str, checksum: str, img_width: int, img_he
     """Create the base JSON structure for the sprite."""
     return {
         "_resourceType": "sprite",
-        "id": str(uuid.uuid4()),
+        "id": _uuid4(),
         "name": name,
         "symbol": "sprite_" + name.replace(" ", "_"),
         "numFrames": 0,
@@ -259,22 +304,25 @@ def _create_base_json_structure(name: str, checksum: str, img_width: int, img_he
     }
 
 
-def _get_animation_count(state_type: str) -> int:
-    """Get the number of animations for a given state type."""
-    animation_counts = {
-        'fixed': 1, 
-        'multi#f': 3, 
-        'multi': 4, 
-        'multi_movement#f': 6, 
-        'multi_movement': 8
-    }
-    return animation_counts.get(state_type, 1)
+def _list_arg(value: Any) -> List[Any]:
+    """Turn a comma-separated parameter, or a list of values, into a list of auto-cast values."""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return list((auto_cast(a.strip()) for a in str(value).split(",")))
+
+
+def _get_state_info(state_type: str) -> Tuple[int, bool, str]:
+    """Get the animation count, flip flag and clean name for a given state type."""
+    state_info = _STATE_INFO.get(state_type)
+    if state_info is None:
+        state_info = (1, '#f' in state_type, state_type.replace('#f', ""))
+    return state_info
 
 
 def _create_state(state_index: int, state_type: str, flip_left: bool) -> Dict[str, Any]:
     """Create a state dictionary."""
     return {
-        "id": str(uuid.uuid4()),
+        "id": _uuid4(),
         "name": f"state_{state_index}",
         "animationType": state_type,
         "flipLeft": flip_left,
@@ -285,7 +333,7 @@ def _create_state(state_index: int, state_type: str, flip_left: bool) -> Dict[st
 def _create_animation() -> Dict[str, Any]:
     """Create an animation dictionary."""
     return {
-        "id": str(uuid.uuid4()),
+        "id": _uuid4(),
         "frames": []
     }
 
@@ -293,44 +341,67 @@ def _create_animation() -> Dict[str, Any]:
 def _create_frame() -> Dict[str, Any]:
     """Create a frame dictionary."""
     return {
-        "id": str(uuid.uuid4()),
+        "id": _uuid4(),
         "tiles": []
     }
 
 
-def _create_frame_tiles(image: Image.Image, frame_index: int, state_offset: int, animation_index: int,
-                       vert_tiles_per_frame: int, hor_tiles_per_frame: int, layer_count: int,
-                       tile_width: int, tile_height: int, h_compensation: int, layer_palettes: List[int],
+def _uuid4() -> str:
+    """Generate a single random version 4 UUID string."""
+    return _uuid4_batch(1)[0]
+
+
+def _uuid4_batch(count: int) -> List[str]:
+    """Generate `count` random version 4 UUID strings from a single os.urandom call."""
+    hex_data = os.urandom(16 * count).hex()
+    uuids = []
+    for i in range(0, 32 * count, 32):
+        variant = '89ab'[int(hex_data[i + 16], 16) & 3]
+        uuids.append(f"{hex_data[i:i + 8]}-{hex_data[i + 8:i + 12]}-4{hex_data[i + 13:i + 16]}-"
+                     f"{variant}{hex_data[i + 17:i + 20]}-{hex_data[i + 20:i + 32]}")
+    return uuids
+
+
+def _create_tile_layout(frame_top: int, vert_tiles_per_frame: int, hor_tiles_per_frame: int,
+                        layer_count: int, tile_width: int, tile_height: int,
+                        h_compensation: int) -> List[Tuple[int, int, int, int, int]]:
+    """
+    Precompute the tile offsets of an animation's frames.
+
+    Returns one (layer_index, x, y, slice_x_offset, slice_y) entry per tile, in frame tile order;
+    slice_x_offset is relative to the left edge of the frame in the image.
+    """
+    layout = []
+    for v_tile_index in range(vert_tiles_per_frame):
+        for h_tile_index in range(hor_tiles_per_frame):
+            for layer_index in range(layer_count):
+                layout.append((
+                    layer_index,
+                    h_tile_index * tile_width + h_compensation,
+                    v_tile_index * tile_height,
+                    h_tile_index * tile_width,
+                    frame_top + (vert_tiles_per_frame * layer_index + v_tile_index) * tile_height
+                ))
+    return layout
+
+
+def _create_frame_tiles(tile_layout: List[Tuple[int, int, int, int, int]], frame_index: int, frame_left: int,
+                       animation_index: int, layer_palettes: List[int],
                        num_tiles: int, state_index: int) -> List[Dict[str, Any]]:
     """Create tiles for a frame."""
     tiles = []
-    tile_in_frame = 0
+    tile_ids = _uuid4_batch(len(tile_layout))
     
-    for v_tile_index in range(vert_tiles_per_frame):
-        for h_tile_index in range(hor_tiles_per_frame):
-            for layer_index in range(layer_count):
-                h_px_index = (h_tile_index + frame_index * hor_tiles_per_frame) * tile_width
-                v_px_index = (state_offset + 
-                             vert_tiles_per_frame * layer_count * animation_index +
-                             vert_tiles_per_frame * layer_index +
-                             v_tile_index) * tile_height
-
-                tile = {
-                    "_comment": f"item: {num_tiles}   state: {state_index}   anim: {animation_index}   frame: {frame_index}   tile {tile_in_frame}   layer: {layer_index}",
-                    "id": str(uuid.uuid4()),
-                    "x": h_tile_index * tile_width + h_compensation,
-                    "y": v_tile_index * tile_height,
-                    "sliceX": h_px_index,
-                    "sliceY": v_px_index,
-                    "palette": 0,
-                    "flipX": False,
-                    "flipY": False,
-                    "objPalette": "OBP0",
-                    "paletteIndex": layer_palettes[layer_index],
-                    "priority": False
-                }
-                
-                tiles.append(tile)
-                tile_in_frame += 1
+    for tile_in_frame, (layer_index, x, y, slice_x_offset, slice_y) in enumerate(tile_layout):
+        tile = _TILE_TEMPLATE.copy()
+        tile["_comment"] = f"item: {num_tiles}   state: {state_index}   anim: {animation_index}   frame: {frame_index}   tile {tile_in_frame}   layer: {layer_index}"
+        tile["id"] = tile_ids[tile_in_frame]
+        tile["x"] = x
+        tile["y"] = y
+        tile["sliceX"] = frame_left + slice_x_offset
+        tile["sliceY"] = slice_y
+        tile["paletteIndex"] = layer_palettes[layer_index]
+        
+        tiles.append(tile)
     
     return tiles
@@ -1,6 +1,6 @@
 import json
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 
 from PIL import Image
 
@@ -8,14 +8,15 @@ from algorithms import _spr_png_to_gbstudio_anim_o1, spr_rgb_to_3color_layers
 from misc.arg_parse import argdict
 
 
-def process(image: Image.Image, gbsres_data: Optional[Dict[str, Any]] = None, params: str = "") -> Image.Image:
+def process(image: Image.Image, gbsres_data: Optional[Dict[str, Any]] = None,
+            params: Union[str, Dict[str, Any]] = "") -> Image.Image:
     """
     Process an image for GB Studio animation generation using an optional GBSRES file as starting point.
     
     Args:
         image: PIL Image to process
         gbsres_data: Optional GBSRES data to use as starting point (preserves ID and other metadata)
-        params: Parameter string for configuration
+        params: Parameter string for configuration, or a dict of already parsed parameters
         
     Returns:
         Processed PIL Image with extra_data containing JSON metadata
@@ -23,18 +24,24 @@ def process(image: Image.Image, gbsres_data: Optional[Dict[str, Any]] = None, pa
     if not isinstance(image, Image.Image):
         raise TypeError("image must be a PIL Image object")
     
-    args = argdict(params)
+    args = dict(params) if isinstance(params, dict) else argdict(params)
 
-    fname = args.setdefault('fname', 'sprite')
-    enable_rgb = args.setdefault('rgb', 'n') == 'y'
-    enable_processing = args.setdefault('processing', 'TBD') == 'True'
+    fname = args.get('fname', 'sprite')
+    # Flags are either the strings of a params string or bools; 1 must not count as True
+    rgb = args.get('rgb', 'n')
+    enable_rgb = rgb == 'y' or rgb is True
+    processing = args.get('processing', 'TBD')
+    enable_processing = processing == 'True' or processing is True
 
-    # Apply RGB processing if requested
+    # Apply RGB processing if requested; its pixel array is passed on so the
+    # animation stage does not have to convert the image again
+    pixels = None
     if enable_rgb:
-        image = spr_rgb_to_3color_layers.process(image)
+        pixels = spr_rgb_to_3color_layers.process_pixels(image)
+        image = Image.fromarray(pixels)
 
     # Process the image for GB Studio animation
-    processed_image = _spr_png_to_gbstudio_anim_o1.process(image, params)
+    processed_image = _spr_png_to_gbstudio_anim_o1.process(image, params, pixels)
 
     # Set save flag based on RGB processing
     processed_image.no_save = not enable_rgb
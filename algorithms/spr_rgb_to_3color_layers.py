@@ -1,3 +1,4 @@
+import numpy as np
 from PIL import Image
 from typing import List, Tuple
 
@@ -27,6 +28,21 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     Raises:
         ValueError: If image height is too small to discard 8 rows
     """
+    return Image.fromarray(process_pixels(image, params))
+
+
+def process_pixels(image: Image.Image, params: str = "") -> np.ndarray:
+    """
+    Convert RGB image to 3-color layers for GB Studio, see `process`.
+    
+    Args:
+        image: PIL Image to process
+        params: Parameter string (unused in this implementation)
+        
+    Returns:
+        (height, width, 3) uint8 array of the color layers stacked vertically, so that
+        later processing stages can keep working on the pixels without converting them
+    """
     if not isinstance(image, Image.Image):
         raise TypeError("image must be a PIL Image object")
     
@@ -50,65 +66,74 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     if rem_height <= 0:
         raise ValueError("Image height is too small to discard 8 rows and proceed.")
 
-    # Create the result image with stacked bands
-    return _create_stacked_bands(image, triplets, width, rem_height)
+    # Create the result with stacked bands
+    return _stack_bands(np.asarray(image), triplets, width, rem_height)
 
 
 def _extract_color_triplets(image: Image.Image, width: int) -> List[Tuple[Tuple[int, int, int], ...]]:
     """Extract color triplets from the first row of the image."""
-    first_row_pixels = [image.getpixel((x, 0)) for x in range(width)]
-    triplets = []
+    row_bytes = image.crop((0, 0, width, 1)).tobytes()
+    first_row_pixels = np.frombuffer(row_bytes, dtype=np.uint8).reshape(width, 3)
+    is_green = np.all(first_row_pixels == (0, 255, 0), axis=1)
+
+    # Only positions that are green themselves or sit 3 pixels before a green break
+    # pixel can end the scan or start a triplet; every other position is skipped
+    breaks = np.flatnonzero(is_green)
+    candidates = np.union1d(breaks, breaks - 3)
+
+    triplets: List[Tuple[Tuple[int, int, int], ...]] = []
     idx = 0
-    
-    while idx + 3 < width:
-        c1 = first_row_pixels[idx]
-        c2 = first_row_pixels[idx + 1]
-        c3 = first_row_pixels[idx + 2]
-        break_pixel = first_row_pixels[idx + 3]
+
+    for candidate in candidates.tolist():
+        if candidate < idx:
+            continue
+        if candidate + 3 >= width:
+            break
 
         # Stop if we hit a green break pixel at the start
-        if c1 == (0, 255, 0):
+        if is_green[candidate]:
             break
 
-        # Check if this is a valid triplet (followed by green break pixel)
-        if break_pixel == (0, 255, 0):
-            triplets.append((c1, c2, c3))
-            idx += 4  # Move past triplet + break pixel
-        else:
-            idx += 1  # Move one pixel forward and continue scanning
-    
+        # Otherwise this candidate is a valid triplet (followed by green break pixel)
+        c1, c2, c3 = (tuple(px) for px in first_row_pixels[candidate:candidate + 3].tolist())
+        triplets.append((c1, c2, c3))
+        idx = candidate + 4  # Move past triplet + break pixel
+
     return triplets
 
 
 def _create_stacked_bands(image: Image.Image, triplets: List[Tuple[Tuple[int, int, int], ...]], 
                          width: int, rem_height: int) -> Image.Image:
     """Create stacked bands for each color triplet."""
-    final_height = rem_height * len(triplets)
-    result_img = Image.new('RGB', (width, final_height), (0, 255, 0))
+    return Image.fromarray(_stack_bands(np.asarray(image), triplets, width, rem_height))
 
-    # Define the mapping from each color in the triplet to its new color
-    mapped_colors = [(224, 248, 207), (134, 192, 108), (7, 24, 33)]
 
-    for i, (col1, col2, col3) in enumerate(triplets):
-        band_y_offset = i * rem_height
-        
-        # Process each row in the remaining image
-        for row in range(rem_height):
-            src_y = row + 8  # Source row in original image
-            for x in range(width):
-                pix = image.getpixel((x, src_y))
-
-                # Map triplet colors to new colors
-                if pix == col1:
-                    new_pix = mapped_colors[0]
-                elif pix == col2:
-                    new_pix = mapped_colors[1]
-                elif pix == col3:
-                    new_pix = mapped_colors[2]
-                else:
-                    continue  # Skip non-matching pixels
-
-                # Place the new pixel in the correct band row
-                result_img.putpixel((x, band_y_offset + row), new_pix)
-
-    return result_img
+def _stack_bands(pixels: np.ndarray, triplets: List[Tuple[Tuple[int, int, int], ...]],
+                 width: int, rem_height: int) -> np.ndarray:
+    """Create stacked bands for each color triplet from an RGB pixel array."""
+    # Source pixels below the 8 discarded header rows, packed to one uint32 per pixel
+    src = _pack_rgb(pixels[8:8 + rem_height, :width])
+    result = np.empty((rem_height * len(triplets), width, 3), dtype=np.uint8)
+
+    # Define the mapping from each color in the triplet to its new color;
+    # the last entry is the green background for non-matching pixels
+    mapped_colors = np.array([(224, 248, 207), (134, 192, 108), (7, 24, 33), (0, 255, 0)], dtype=np.uint8)
+
+    for i, triplet in enumerate(triplets):
+        # Sorted triplet colors with the index of their first occurrence, so that
+        # col1 wins over col2 and col3 when a triplet repeats a color
+        keys, first_index = np.unique(_pack_rgb(np.array(triplet, dtype=np.uint8)), return_index=True)
+
+        # Look every pixel up in the sorted keys in a single pass
+        position = np.minimum(np.searchsorted(keys, src), len(keys) - 1)
+        color_index = np.where(keys[position] == src, first_index[position], 3)
+        result[i * rem_height:(i + 1) * rem_height] = mapped_colors[color_index]
+
+    return result
+
+
+def _pack_rgb(pixels: np.ndarray) -> np.ndarray:
+    """Pack the channels of an RGB pixel array into one uint32 value per pixel."""
+    pixels = pixels.astype(np.uint32)
+    packed: np.ndarray = (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+    return packed
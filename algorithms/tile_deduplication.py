@@ -1,6 +1,7 @@
 from typing import Dict, List, Tuple, Any
+
+import numpy as np
 from PIL import Image
-import hashlib
 
 
 def process(image: Image.Image, params: str = "") -> Image.Image:
@@ -24,56 +25,65 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     if not isinstance(animation_data, dict) or 'states' not in animation_data:
         return image
     
-    # Collect all tiles with their hash and metadata
-    tile_hashes = {}  # hash -> first occurrence tile data
-    tile_replacements = {}  # duplicate_tile_id -> first_tile_id
+    # Get tile dimensions (assuming 8x16 default)
+    tile_width = 8
+    tile_height = 16
     
+    # Collect all tiles with their metadata in a single pass
+    tile_entries = []  # (tile, tile_id, sliceX, sliceY) for every valid tile
     total_tiles = 0
-    duplicate_tiles = 0
     
-    # Process all states and animations
-    for state_index, state in enumerate(animation_data['states']):
-        for animation_index, animation in enumerate(state.get('animations', [])):
-            for frame_index, frame in enumerate(animation.get('frames', [])):
-                for tile_index, tile in enumerate(frame.get('tiles', [])):
+    for state in animation_data['states']:
+        for animation in state.get('animations', []):
+            for frame in animation.get('frames', []):
+                for tile in frame.get('tiles', []):
                     total_tiles += 1
-                    
-                    # Extract tile image data
                     tile_id = tile.get('id', f"tile_{total_tiles}")
-                    slice_x = tile.get('sliceX', 0)
-                    slice_y = tile.get('sliceY', 0)
-                    
-                    # Get tile dimensions (assuming 8x16 default)
-                    tile_width = 8
-                    tile_height = 16
                     
                     try:
-                        # Extract tile from the processed image
-                        tile_img = image.crop((slice_x, slice_y, slice_x + tile_width, slice_y + tile_height))
-                        
-                        # Create hash of tile pixel data
-                        tile_hash = _create_tile_hash(tile_img)
-                        
-                        if tile_hash in tile_hashes:
-                            # Found a duplicate tile
-                            duplicate_tiles += 1
-                            first_tile_id = tile_hashes[tile_hash]['id']
-                            tile_replacements[tile_id] = first_tile_id
-                            
-                            # Replace duplicate tile with reference to first tile
-                            _replace_tile_with_reference(tile, tile_hashes[tile_hash])
-                        else:
-                            # First occurrence of this tile
-                            tile_hashes[tile_hash] = {
-                                'id': tile_id,
-                                'sliceX': slice_x,
-                                'sliceY': slice_y,
-                                'tile_img': tile_img
-                            }
-                    
-                    except Exception as e:
+                        slice_x = int(tile.get('sliceX', 0))
+                        slice_y = int(tile.get('sliceY', 0))
+                    except (TypeError, ValueError) as e:
                         print(f"Warning: Could not process tile {tile_id}: {e}")
                         continue
+                    
+                    tile_entries.append((tile, tile_id, slice_x, slice_y))
+    
+    # Many tiles share the same slice position, so only extract each distinct position once
+    coords = np.array([(entry[2], entry[3]) for entry in tile_entries], dtype=np.intp).reshape(-1, 2)
+    unique_coords, coord_first_index, coord_inverse = np.unique(
+        coords, axis=0, return_index=True, return_inverse=True)
+    
+    # Extract those tiles at once and group the positions by identical pixel content
+    tile_pixels = _extract_tiles(image, unique_coords[:, 0].tolist(), unique_coords[:, 1].tolist(),
+                                 tile_width, tile_height)
+    tile_rows = tile_pixels.reshape(len(unique_coords), tile_width * tile_height * 3)
+    _, content_inverse = np.unique(tile_rows, axis=0, return_inverse=True)
+    content_inverse = content_inverse.reshape(-1)
+    
+    # The first occurrence of each distinct tile is the earliest tile of any position in its group
+    unique_tile_count = int(content_inverse.max()) + 1 if len(content_inverse) else 0
+    group_first_index = np.full(unique_tile_count, len(tile_entries), dtype=np.intp)
+    np.minimum.at(group_first_index, content_inverse, coord_first_index)
+    first_index_of = group_first_index[content_inverse[coord_inverse.reshape(-1)]]
+    
+    tile_replacements = {}  # duplicate_tile_id -> first_tile_id
+    duplicate_tiles = 0
+    
+    for index, (tile, tile_id, _, _) in enumerate(tile_entries):
+        first_index = first_index_of[index]
+        if first_index == index:
+            continue
+        
+        # Found a duplicate tile; replace it with a reference to the first tile
+        _, first_tile_id, first_slice_x, first_slice_y = tile_entries[first_index]
+        duplicate_tiles += 1
+        tile_replacements[tile_id] = first_tile_id
+        _replace_tile_with_reference(tile, {
+            'id': first_tile_id,
+            'sliceX': first_slice_x,
+            'sliceY': first_slice_y
+        })
     
     # Update the image's extra_data with deduplication info
     if 'deduplication' not in animation_data:
@@ -81,7 +91,7 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     
     animation_data['deduplication'] = {
         'total_tiles': total_tiles,
-        'unique_tiles': len(tile_hashes),
+        'unique_tiles': unique_tile_count,
         'duplicate_tiles': duplicate_tiles,
         'memory_saved': duplicate_tiles,
         'tile_replacements': tile_replacements
@@ -90,25 +100,44 @@ def process(image: Image.Image, params: str = "") -> Image.Image:
     return image
 
 
-def _create_tile_hash(tile_img: Image.Image) -> str:
+def _extract_tiles(image: Image.Image, slice_xs: List[int], slice_ys: List[int],
+                   tile_width: int, tile_height: int) -> np.ndarray:
     """
-    Create a hash of the tile image data for comparison.
+    Extract many tiles from an image into a single array.
+    
+    Areas outside the image read as black pixels, like a PIL crop would pad them.
     
     Args:
-        tile_img: PIL Image tile
+        image: PIL Image to extract the tiles from
+        slice_xs: Left edge of each tile in pixels
+        slice_ys: Top edge of each tile in pixels
+        tile_width: Tile width in pixels
+        tile_height: Tile height in pixels
         
     Returns:
-        String hash of the tile data
+        uint8 array of shape (num_tiles, tile_height, tile_width, 3)
     """
-    # Convert to RGB if needed
-    if tile_img.mode != 'RGB':
-        tile_img = tile_img.convert('RGB')
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    pixels = np.asarray(image)
+    height, width = pixels.shape[:2]
+    xs = np.asarray(slice_xs, dtype=np.intp)
+    ys = np.asarray(slice_ys, dtype=np.intp)
+    tiles = np.zeros((xs.size, tile_height, tile_width, 3), dtype=np.uint8)
+    
+    # Gather the tiles that lie fully inside the image from a view of every possible tile position
+    inside = (xs >= 0) & (ys >= 0) & (xs <= width - tile_width) & (ys <= height - tile_height)
+    if inside.any():
+        windows = np.lib.stride_tricks.sliding_window_view(pixels, (tile_height, tile_width, 3))
+        tiles[inside] = windows[ys[inside], xs[inside], 0]
     
-    # Get pixel data as bytes
-    pixel_data = tile_img.tobytes()
+    # Crop the rest one by one, so that far-out positions never grow the image
+    for index in np.flatnonzero(~inside).tolist():
+        slice_x, slice_y = int(xs[index]), int(ys[index])
+        tiles[index] = np.asarray(image.crop((slice_x, slice_y, slice_x + tile_width, slice_y + tile_height)))
     
-    # Create hash
-    return hashlib.md5(pixel_data).hexdigest()
+    return tiles
 
 
 def _replace_tile_with_reference(duplicate_tile: Dict[str, Any], first_tile: Dict[str, Any]) -> None:
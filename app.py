@@ -1,32 +1,35 @@
 import streamlit as st
 import zipfile
 import io
-import os
-import tempfile
+import functools
+import hashlib
+import time
+import numpy as np
 from PIL import Image
 from algorithms.spr_png_to_gbstudio_anim import process, load_gbsres_file
 from algorithms import tile_deduplication
 import json
+from typing import Any, Dict, List, Optional, Tuple
 
 
-def scale_image_for_display(image, max_width=400, zoom_level=1):
+def scale_image_for_display(image: Image.Image, max_width: int = 400, zoom_level: int = 1) -> Image.Image:
     """Scale an image using nearest neighbor interpolation for pixel art."""
-    # Apply zoom level first
-    if zoom_level > 1:
-        zoomed_width = image.width * zoom_level
-        zoomed_height = image.height * zoom_level
-        image = image.resize((zoomed_width, zoomed_height), Image.NEAREST)
-    
-    # Then apply max width constraint if needed
-    if image.width <= max_width:
+    # Nothing to do for an unzoomed image that already fits
+    if zoom_level <= 1 and image.width <= max_width:
         return image
     
-    # Calculate scale factor
-    scale_factor = max_width / image.width
+    # Size after zooming, before the max width constraint
+    zoomed_width = image.width * max(zoom_level, 1)
+    zoomed_height = image.height * max(zoom_level, 1)
     
-    # Calculate new dimensions
-    new_width = int(image.width * scale_factor)
-    new_height = int(image.height * scale_factor)
+    if zoomed_width <= max_width:
+        # Integer zoom that is not clamped afterwards
+        return _zoom_pixel_art(image, zoom_level)
+    
+    # Then apply max width constraint, folded into the same single resize.
+    # Integer arithmetic keeps the width exactly max_width and the height exact.
+    new_width = max_width
+    new_height = max(1, zoomed_height * max_width // zoomed_width)
     
     # Resize using nearest neighbor
     scaled_image = image.resize((new_width, new_height), Image.NEAREST)
@@ -34,20 +37,28 @@ def scale_image_for_display(image, max_width=400, zoom_level=1):
     return scaled_image
 
 
-def create_pixel_perfect_display(image, max_width=400, zoom_level=1):
-    """Create a pixel-perfect display by scaling and saving to temp file with CSS."""
+def _zoom_pixel_art(image: Image.Image, zoom_level: int) -> Image.Image:
+    """Enlarge an image by an integer zoom level, repeating each pixel as a block where possible."""
+    if image.mode in ('RGB', 'RGBA', 'L'):
+        pixels = np.asarray(image)
+        return Image.fromarray(np.repeat(np.repeat(pixels, zoom_level, axis=0), zoom_level, axis=1))
+    return image.resize((image.width * zoom_level, image.height * zoom_level), Image.NEAREST)
+
+
+def create_pixel_perfect_display(image: Image.Image, max_width: int = 400,
+                                 zoom_level: int = 1) -> Tuple[bytes, Tuple[int, int]]:
+    """Create a pixel-perfect display by scaling and encoding to PNG bytes in memory."""
     # Scale the image using nearest neighbor
     scaled_image = scale_image_for_display(image, max_width, zoom_level)
     
-    # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-    scaled_image.save(temp_file.name, format='PNG')
-    temp_file.close()
+    # Encode to PNG in memory; previews favour speed over file size
+    buffer = io.BytesIO()
+    scaled_image.save(buffer, format='PNG', compress_level=1)
     
-    return temp_file.name, scaled_image.size
+    return buffer.getvalue(), scaled_image.size
 
 
-def parse_palette_string(palette_str):
+def parse_palette_string(palette_str: str) -> Dict[str, Any]:
     """
     Parse palette string in format: background;r1,g1,b1;r2,g2,b2;...
     
@@ -74,7 +85,7 @@ def parse_palette_string(palette_str):
                 # Validate hex colors
                 for color in colors:
                     color = color.strip()
-                    if len(color) != 6 or not all(c in '0123456789abcdefABCDEF' for c in color):
+                    if len(color) != 6 or not _is_hex_rgb(color):
                         raise ValueError(f"Invalid hex color: {color}")
                 palettes.append([color.strip().lower() for color in colors])
         
@@ -86,7 +97,15 @@ def parse_palette_string(palette_str):
         raise ValueError(f"Invalid palette format: {e}")
 
 
-def extract_palette_from_image(image):
+def _is_hex_rgb(color: str) -> bool:
+    """Check that a color string is exactly three hex-encoded bytes."""
+    try:
+        return len(bytes.fromhex(color)) == 3
+    except ValueError:
+        return False
+
+
+def extract_palette_from_image(image: Image.Image) -> Optional[Dict[str, Any]]:
     """
     Extract palette colors from an RGB image using the same logic as spr_rgb_to_3color_layers.py.
     
@@ -104,14 +123,16 @@ def extract_palette_from_image(image):
         Dictionary with 'background' and 'palettes' keys, or None if extraction fails
     """
     try:
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
         width, height = image.size
         
         if width < 4:
             return None
         
+        # Only the first row is read, so only that row is converted to RGB
+        image = image.crop((0, 0, width, 1))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
         # Extract color triplets from the first row using the same logic as spr_rgb_to_3color_layers.py
         triplets = _extract_color_triplets_for_palette(image, width)
         
@@ -136,35 +157,46 @@ def extract_palette_from_image(image):
         return None
 
 
-def _extract_color_triplets_for_palette(image: Image.Image, width: int):
+def _extract_color_triplets_for_palette(image: Image.Image, width: int) -> List[Tuple[Tuple[int, ...], ...]]:
     """
     Extract color triplets from the first row of the image.
     This follows the exact same logic as spr_rgb_to_3color_layers.py.
     """
-    first_row_pixels = [image.getpixel((x, 0)) for x in range(width)]
-    triplets = []
+    row_bytes = image.crop((0, 0, width, 1)).tobytes()
+    first_row_pixels = np.frombuffer(row_bytes, dtype=np.uint8).reshape(width, 3)
+    is_green = np.all(first_row_pixels == (0, 255, 0), axis=1)
+    
+    # Only positions that are green themselves or sit 3 pixels before a green break
+    # pixel can end the scan or start a triplet; every other position is skipped
+    breaks = np.flatnonzero(is_green)
+    candidates = np.union1d(breaks, breaks - 3)
+    
+    triplets: List[Tuple[Tuple[int, ...], ...]] = []
     idx = 0
     
-    while idx + 3 < width:
-        c1 = first_row_pixels[idx]
-        c2 = first_row_pixels[idx + 1]
-        c3 = first_row_pixels[idx + 2]
-        break_pixel = first_row_pixels[idx + 3]
-
+    for candidate in candidates.tolist():
+        if candidate < idx:
+            continue
+        if candidate + 3 >= width:
+            break
+        
         # Stop if we hit a green break pixel at the start
-        if c1 == (0, 255, 0):
+        if is_green[candidate]:
             break
-
-        # Check if this is a valid triplet (followed by green break pixel)
-        if break_pixel == (0, 255, 0):
-            triplets.append((c1, c2, c3))
-            idx += 4  # Move past triplet + break pixel
-        else:
-            idx += 1  # Move one pixel forward and continue scanning
+        
+        # Otherwise this candidate is a valid triplet (followed by green break pixel)
+        c1, c2, c3 = (tuple(px) for px in first_row_pixels[candidate:candidate + 3].tolist())
+        triplets.append((c1, c2, c3))
+        idx = candidate + 4  # Move past triplet + break pixel
     
     return triplets
 
 
+# Convert to 15-bit (5 bits per channel): scale from 0-255 to 0-31, then back to 0-248 in steps of 8.
+# This is not a plain high-bit mask, e.g. 8 maps to 0.
+_QUANTIZE_15BIT_LUT = [int((value / 255.0) * 31) * 8 for value in range(256)]
+
+
 def quantize_to_15bit(image):
     """
     Quantize RGB colors to 15-bit color space for Game Boy visualization.
@@ -178,31 +210,44 @@ def quantize_to_15bit(image):
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    result = image.copy()
-    data = result.getdata()
-    new_data = []
-    
-    for pixel in data:
-        r, g, b = pixel
-        
-        # Convert to 15-bit (5 bits per channel)
-        # Scale from 0-255 to 0-31, then back to 0-255
-        r_15bit = int((r / 255.0) * 31) * 8  # Scale to 0-248 in steps of 8
-        g_15bit = int((g / 255.0) * 31) * 8
-        b_15bit = int((b / 255.0) * 31) * 8
-        
-        # Clamp to valid 15-bit range
-        r_15bit = min(248, max(0, r_15bit))
-        g_15bit = min(248, max(0, g_15bit))
-        b_15bit = min(248, max(0, b_15bit))
-        
-        new_data.append((r_15bit, g_15bit, b_15bit))
-    
-    result.putdata(new_data)
-    return result
+    # One lookup table pass for all three channels
+    return image.point(_QUANTIZE_15BIT_LUT * 3)
+
 
+# RGBA pixels viewed as native-endian uint32 words, so each color test is a single compare
+_RGB_BYTES_MASK = np.frombuffer(bytes((255, 255, 255, 0)), dtype=np.uint32)[0]
 
 
+def _rgb_word(color: Tuple[int, ...]) -> np.uint32:
+    """Get the uint32 word of an RGBA pixel with the given RGB color and the alpha bits cleared."""
+    word: np.uint32 = np.frombuffer(bytes((*color, 0)), dtype=np.uint32)[0]
+    return word
+
+
+def _rgb_words(pixels: np.ndarray) -> np.ndarray:
+    """View an RGBA pixel array as one uint32 word per pixel, with the alpha bits cleared."""
+    words: np.ndarray = pixels.view(np.uint32)[..., 0] & _RGB_BYTES_MASK
+    return words
+
+
+_GREEN_RGB_WORD = _rgb_word((0, 255, 0))
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_palette_colors(hex_colors: Tuple[str, ...]) -> Tuple[Tuple[int, ...], ...]:
+    """Parse a tuple of hex color strings into RGB tuples, once per distinct palette."""
+    return tuple(tuple(bytes.fromhex(hex_color[0:6])) for hex_color in hex_colors)
+
+
+def _detail_log_enabled() -> bool:
+    """
+    Whether per-tile and per-frame details should go to the output log.
+    
+    These lines add up to thousands per render, so they are only formatted when
+    "Detailed Log" is enabled in the sidebar.
+    """
+    return 'output_log' in st.session_state and bool(st.session_state.get('detail_log', False))
+
 
 def apply_palette_to_layer(image, palette_colors, palette_array_index=0):
     """
@@ -223,10 +268,20 @@ def apply_palette_to_layer(image, palette_colors, palette_array_index=0):
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    # Create a copy to modify
-    result = image.copy()
-    data = result.getdata()
-    new_data = []
+    pixels = np.array(image.convert('RGBA'), dtype=np.uint8)
+    _apply_palette_to_pixels(pixels, _rgb_words(pixels), palette_colors, palette_array_index)
+    
+    return Image.fromarray(pixels[..., :3])
+
+
+def _apply_palette_to_pixels(pixels: np.ndarray, words: np.ndarray, palette_colors: Dict[str, Any],
+                             palette_array_index: int) -> None:
+    """
+    Apply palette colors in place to an RGBA pixel array, see `apply_palette_to_layer`.
+    
+    `words` holds the RGB words of `pixels` (see `_rgb_words`) and is updated along with them.
+    """
+    detail_log = _detail_log_enabled()
     
     # GB Studio color mapping
     gb_light = (224, 248, 207)    # e0f8cf
@@ -241,70 +296,37 @@ def apply_palette_to_layer(image, palette_colors, palette_array_index=0):
     if palette_array_index < len(palette_colors['palettes']):
         palette_to_use = palette_colors['palettes'][palette_array_index]
         # Add to debug log if available
-        if 'output_log' in st.session_state:
+        if detail_log:
             st.session_state.output_log.append(f"🎨 Using palette array index {palette_array_index}: {', '.join(palette_to_use)}")
     elif len(palette_colors['palettes']) > 0:
         # Fallback to first palette if array index is out of range
         palette_to_use = palette_colors['palettes'][0]
         # Add to debug log if available
-        if 'output_log' in st.session_state:
+        if detail_log:
             st.session_state.output_log.append(f"🎨 Palette array index {palette_array_index} out of range, using palette 0: {', '.join(palette_to_use)}")
     
-    # Count color mappings for debugging
-    color_counts = {'light': 0, 'mid': 0, 'dark': 0, 'other': 0}
+    # Count color mappings for debugging (light, mid, dark)
+    counts = [0, 0, 0]
     
-    for pixel in data:
-        r, g, b = pixel
-        
-        # Check if it's the green background (0, 255, 0)
-        if r == 0 and g == 255 and b == 0:
-            # Keep green as transparent
-            new_data.append(pixel)
-        else:
-            # Map GB Studio colors to palette colors
-            mapped = False
-            
-            if palette_to_use and len(palette_to_use) >= 3:
-                # Check for GB Studio light color (e0f8cf)
-                if pixel == gb_light:
-                    hex_color = palette_to_use[0]
-                    new_r = int(hex_color[0:2], 16)
-                    new_g = int(hex_color[2:4], 16)
-                    new_b = int(hex_color[4:6], 16)
-                    new_data.append((new_r, new_g, new_b))
-                    mapped = True
-                    color_counts['light'] += 1
-                
-                # Check for GB Studio mid color (86c06c)
-                elif pixel == gb_mid:
-                    hex_color = palette_to_use[1]
-                    new_r = int(hex_color[0:2], 16)
-                    new_g = int(hex_color[2:4], 16)
-                    new_b = int(hex_color[4:6], 16)
-                    new_data.append((new_r, new_g, new_b))
-                    mapped = True
-                    color_counts['mid'] += 1
-                
-                # Check for GB Studio dark color (071821)
-                elif pixel == gb_dark:
-                    hex_color = palette_to_use[2]
-                    new_r = int(hex_color[0:2], 16)
-                    new_g = int(hex_color[2:4], 16)
-                    new_b = int(hex_color[4:6], 16)
-                    new_data.append((new_r, new_g, new_b))
-                    mapped = True
-                    color_counts['dark'] += 1
-            
-            if not mapped:
-                new_data.append(pixel)  # Keep original if no mapping found
-                color_counts['other'] += 1
+    # Green background (0, 255, 0) stays as transparent and is not counted
+    non_green_count = int(np.count_nonzero(words != _GREEN_RGB_WORD))
     
-    # Add color mapping debug information to log
-    if 'output_log' in st.session_state:
-        st.session_state.output_log.append(f"🎨 Palette array index {palette_array_index} color mappings: light={color_counts['light']}, mid={color_counts['mid']}, dark={color_counts['dark']}, other={color_counts['other']}")
+    if palette_to_use and len(palette_to_use) >= 3:
+        # Map GB Studio colors to palette colors; masks come from the original pixels
+        masks = [words == _rgb_word(gb_color) for gb_color in (gb_light, gb_mid, gb_dark)]
+        for i, (palette_color, mask) in enumerate(zip(_parse_palette_colors(tuple(palette_to_use[:3])), masks)):
+            pixels[mask, :3] = palette_color
+            words[mask] = _rgb_word(palette_color)
+            counts[i] = int(np.count_nonzero(mask))
+    
+    light_count, mid_count, dark_count = counts
+    # Keep original if no mapping found
+    other_count = non_green_count - light_count - mid_count - dark_count
     
-    result.putdata(new_data)
-    return result
+    # Add color mapping debug information to log
+    if detail_log:
+        st.session_state.output_log.append(f"🎨 Palette array index {palette_array_index} color mappings: light={light_count}, mid={mid_count}, dark={dark_count}, other={other_count}")
+
 
 def create_animation_gifs(processed_image, zoom_level=1, custom_palette=None, quantize_15bit=False):
     """
@@ -312,10 +334,10 @@ def create_animation_gifs(processed_image, zoom_level=1, custom_palette=None, qu
     
     Args:
         processed_image: Processed PIL Image with extra_data containing animation metadata
-        zoom_level: Zoom level for the GIF frames
+        zoom_level: Zoom level the GIFs are displayed at
         
     Returns:
-        Dictionary mapping state names to GIF file paths
+        Dictionary mapping state names to GIF bytes, file paths and display widths
     """
     if not hasattr(processed_image, 'extra_data') or not processed_image.extra_data:
         return {}
@@ -326,34 +348,31 @@ def create_animation_gifs(processed_image, zoom_level=1, custom_palette=None, qu
     
     gifs = {}
     base_image = processed_image
+    frame_cache: Dict[Tuple[Any, ...], Tuple[Optional[Image.Image], List[str]]] = {}  # Frames with identical tile layouts are composed once per call
+    pixel_cache: Dict[int, np.ndarray] = {}  # Pixel arrays frames are cut from, by id of their image
+    effective_zoom = zoom_level + 2  # GIFs are displayed at zoom level + 2 for extra clarity
     
     for state in animation_data['states']:
         state_name = state.get('name', 'unknown')
         state_type = state.get('animationType', 'fixed')
         flip_left = state.get('flipLeft', False)
+        animations = state.get('animations', [])
         
         # Create GIF for each animation in the state
-        for anim_index, animation in enumerate(state.get('animations', [])):
+        for anim_index, animation in enumerate(animations):
             frames = animation.get('frames', [])
             if not frames:
                 continue
             
-            # Create frame images with proper scaling (zoom level + 2 for extra clarity)
+            # Create frame images at native size; the browser scales them up to the effective zoom
             frame_images = []
-            effective_zoom = zoom_level + 2  # Add 2 for extra clarity
             
             for frame in frames:
                 # Create a single frame image that combines all layers with proper palette application
-                frame_img = create_frame_image(base_image, frame, 1, flip_left, custom_palette)
+                # (15-bit quantized if requested)
+                frame_img = _create_frame_image_cached(frame_cache, pixel_cache, base_image, frame, flip_left, custom_palette,
+                                                       quantize_15bit)
                 if frame_img:
-                    # Apply 15-bit quantization if requested
-                    if quantize_15bit:
-                        frame_img = quantize_to_15bit(frame_img)
-                    
-                    # Apply effective zoom with nearest neighbor interpolation for pixel-perfect scaling
-                    new_width = frame_img.width * effective_zoom
-                    new_height = frame_img.height * effective_zoom
-                    frame_img = frame_img.resize((new_width, new_height), Image.NEAREST)
                     frame_images.append(frame_img)
             
             if frame_images:
@@ -368,16 +387,11 @@ def create_animation_gifs(processed_image, zoom_level=1, custom_palette=None, qu
                     loop=0,  # Infinite loop
                     optimize=True
                 )
-                gif_buffer.seek(0)
-                
-                # Save to temporary file
-                temp_gif = tempfile.NamedTemporaryFile(delete=False, suffix='.gif')
-                temp_gif.write(gif_buffer.getvalue())
-                temp_gif.close()
                 
-                gif_key = f"{state_name}_anim_{anim_index}" if len(state.get('animations', [])) > 1 else state_name
+                gif_key = f"{state_name}_anim_{anim_index}" if len(animations) > 1 else state_name
                 gifs[gif_key] = {
-                    'path': temp_gif.name,
+                    'data': gif_buffer.getvalue(),
+                    'display_width': frame_images[0].width * effective_zoom,
                     'state_type': state_type,
                     'frame_count': len(frame_images),
                     'flip_left': flip_left
@@ -386,7 +400,40 @@ def create_animation_gifs(processed_image, zoom_level=1, custom_palette=None, qu
     return gifs
 
 
-def create_frame_image(base_image, frame_data, zoom_level=1, flip_left=False, custom_palette=None):
+def _create_frame_image_cached(frame_cache: Dict[Tuple[Any, ...], Tuple[Optional[Image.Image], List[str]]],
+                               pixel_cache: Dict[int, np.ndarray], base_image: Image.Image,
+                               frame_data: Dict[str, Any], flip_left: bool,
+                               custom_palette: Optional[Dict[str, Any]],
+                               quantize_15bit: bool = False) -> Optional[Image.Image]:
+    """
+    Create a frame image like `create_frame_image`, reusing the result for identical tile layouts.
+    
+    With `quantize_15bit` the cached frame is stored already quantized, so each distinct frame
+    is quantized once. The log lines of the first composition are repeated on reuse, so the
+    output log is unchanged.
+    """
+    key = (tuple((tile.get('sliceX', 0), tile.get('sliceY', 0), tile.get('x', 0), tile.get('y', 0),
+                  tile.get('flipX', False), tile.get('flipY', False), tile.get('paletteIndex', 1))
+                 for tile in frame_data.get('tiles', [])), flip_left)
+    
+    if key not in frame_cache:
+        log_start = len(st.session_state.output_log) if 'output_log' in st.session_state else 0
+        frame_img = create_frame_image(base_image, frame_data, 1, flip_left, custom_palette, pixel_cache)
+        if frame_img and quantize_15bit:
+            frame_img = quantize_to_15bit(frame_img)
+        log_lines = st.session_state.output_log[log_start:] if 'output_log' in st.session_state else []
+        frame_cache[key] = (frame_img, log_lines)
+    else:
+        frame_img, log_lines = frame_cache[key]
+        if 'output_log' in st.session_state:
+            st.session_state.output_log.extend(log_lines)
+    
+    return frame_img
+
+
+def create_frame_image(base_image: Image.Image, frame_data: Dict[str, Any], zoom_level: int = 1,
+                       flip_left: bool = False, custom_palette: Optional[Dict[str, Any]] = None,
+                       pixel_cache: Optional[Dict[int, np.ndarray]] = None) -> Optional[Image.Image]:
     """
     Create a single frame image from frame data with proper layer composition and palette application.
     
@@ -396,6 +443,7 @@ def create_frame_image(base_image, frame_data, zoom_level=1, flip_left=False, cu
         zoom_level: Zoom level for the frame (currently unused, scaling done in GIF creation)
         flip_left: Whether to flip the frame horizontally
         custom_palette: Custom palette to apply to layers
+        pixel_cache: Pixel arrays of earlier calls for the same base image, see `_frame_source_pixels`
         
     Returns:
         PIL Image of the frame or None if no valid tiles
@@ -404,37 +452,44 @@ def create_frame_image(base_image, frame_data, zoom_level=1, flip_left=False, cu
     if not tiles:
         return None
     
+    detail_log = _detail_log_enabled()
+    
+    # Unpack each tile's fields once: (sliceX, sliceY, x, y, flipX, flipY)
+    tile_fields = [(tile.get('sliceX', 0), tile.get('sliceY', 0), tile.get('x', 0), tile.get('y', 0),
+                    tile.get('flipX', False), tile.get('flipY', False)) for tile in tiles]
+    
     # Calculate frame dimensions from tile positions
-    max_x = max(tile.get('x', 0) + 8 for tile in tiles)  # Assuming 8x16 tiles
-    max_y = max(tile.get('y', 0) + 16 for tile in tiles)
+    max_x = max(fields[2] + 8 for fields in tile_fields)  # Assuming 8x16 tiles
+    max_y = max(fields[3] + 16 for fields in tile_fields)
     
     # Create a fresh frame canvas with background color
     # This ensures no accumulation between frames
     if custom_palette and custom_palette.get('background'):
         # Use custom background color
         bg_hex = custom_palette['background']
-        bg_r = int(bg_hex[0:2], 16)
-        bg_g = int(bg_hex[2:4], 16)
-        bg_b = int(bg_hex[4:6], 16)
+        bg_r, bg_g, bg_b = bytes.fromhex(bg_hex[0:6])
         frame_img = Image.new('RGBA', (max_x, max_y), (bg_r, bg_g, bg_b, 255))
     else:
         # Default green background (Game Boy transparent color)
         frame_img = Image.new('RGBA', (max_x, max_y), (0, 255, 0, 255))
     
     # Group tiles by layer (paletteIndex) and create sequential mapping for GIF visualization
-    tiles_by_layer = {}
-    palette_index_to_array_index = {}  # Maps converted palette index to sequential array index
+    tiles_by_layer: Dict[int, List[Dict[str, Any]]] = {}
+    fields_by_layer: Dict[int, List[Tuple[Any, ...]]] = {}
+    palette_index_to_array_index: Dict[int, int] = {}  # Maps converted palette index to sequential array index
     
-    for tile in tiles:
+    for tile, fields in zip(tiles, tile_fields):
         palette_index = tile.get('paletteIndex', 1) - 1  # Convert to 0-based (3->2, 4->3, etc.)
         if palette_index not in tiles_by_layer:
             tiles_by_layer[palette_index] = []
+            fields_by_layer[palette_index] = []
             # Map this palette index to the next sequential palette array index (0, 1, 2...)
             palette_index_to_array_index[palette_index] = len(palette_index_to_array_index)
         tiles_by_layer[palette_index].append(tile)
+        fields_by_layer[palette_index].append(fields)
     
     # Debug: Add layer information to log
-    if 'output_log' in st.session_state:
+    if detail_log:
         st.session_state.output_log.append(f"🎬 Found {len(tiles_by_layer)} layers:")
         for layer_idx, layer_tiles in tiles_by_layer.items():
             palette_array_idx = palette_index_to_array_index.get(layer_idx, 0)
@@ -445,61 +500,47 @@ def create_frame_image(base_image, frame_data, zoom_level=1, flip_left=False, cu
                 st.session_state.output_log.append(f"    First tile paletteIndex: {first_tile.get('paletteIndex', 'N/A')}")
                 st.session_state.output_log.append(f"    First tile position: ({first_tile.get('x', 0)}, {first_tile.get('y', 0)})")
     
+    # Tiles are cut from the processed image's pixel array rather than with Image.crop
+    base_pixels = _frame_source_pixels({} if pixel_cache is None else pixel_cache, base_image)
+    
+    # Tile size and palette settings are the same for every tile
+    tile_width = 8  # Default tile width
+    tile_height = 16  # Default tile height
+    apply_palette = bool(custom_palette and custom_palette.get('palettes'))
+    
     # Process each layer separately
     for layer_index in sorted(tiles_by_layer.keys()):
-        layer_tiles = tiles_by_layer[layer_index]
+        layer_fields = fields_by_layer[layer_index]
+        # Map the layer index to the sequential palette array index for GIF visualization
+        palette_array_index = palette_index_to_array_index.get(layer_index, 0)
         
-        if 'output_log' in st.session_state:
-            st.session_state.output_log.append(f"🎬 Processing layer {layer_index} with {len(layer_tiles)} tiles")
-        
-        for tile in layer_tiles:
-            slice_x = tile.get('sliceX', 0)
-            slice_y = tile.get('sliceY', 0)
-            tile_x = tile.get('x', 0)
-            tile_y = tile.get('y', 0)
-            flip_x = tile.get('flipX', False)
-            flip_y = tile.get('flipY', False)
-            
-            # Extract tile from base image
-            tile_width = 8  # Default tile width
-            tile_height = 16  # Default tile height
-            
+        if detail_log:
+            st.session_state.output_log.append(f"🎬 Processing layer {layer_index} with {len(layer_fields)} tiles")
+        
+        for slice_x, slice_y, tile_x, tile_y, flip_x, flip_y in layer_fields:
             try:
-                tile_img = base_image.crop((slice_x, slice_y, slice_x + tile_width, slice_y + tile_height))
-                
-                # Apply flips
-                if flip_x:
-                    tile_img = tile_img.transpose(Image.FLIP_LEFT_RIGHT)
-                if flip_y:
-                    tile_img = tile_img.transpose(Image.FLIP_TOP_BOTTOM)
+                tile_pixels = _crop_tile_pixels(base_pixels, slice_x, slice_y, tile_width, tile_height)
                 
-                # Apply state-level flip
-                if flip_left:
-                    tile_img = tile_img.transpose(Image.FLIP_LEFT_RIGHT)
+                # Apply flips as one array view; the state-level flip cancels out a tile's own flipX
+                flip_horizontal = bool(flip_x) != bool(flip_left)
+                tile_pixels = tile_pixels[::-1 if flip_y else 1, ::-1 if flip_horizontal else 1]
                 
                 # Apply palette to this layer's tile
-                if custom_palette:
-                    if 'output_log' in st.session_state:
-                        st.session_state.output_log.append(f"🎨 Applying palette to layer {layer_index}, tile at ({tile_x}, {tile_y})")
-                    # Map the layer index to the sequential palette array index for GIF visualization
-                    palette_array_index = palette_index_to_array_index.get(layer_index, 0)
-                    tile_img = apply_palette_to_layer(tile_img, custom_palette, palette_array_index)
+                if custom_palette and detail_log:
+                    st.session_state.output_log.append(f"🎨 Applying palette to layer {layer_index}, tile at ({tile_x}, {tile_y})")
                 
-                # Convert green (0, 255, 0) to transparent for proper layering
-                if tile_img.mode == 'RGB':
-                    tile_img = tile_img.convert('RGBA')
+                # Copy the tile into an RGBA array; applying a palette drops any alpha, as converting to RGB did
+                rgba_pixels = np.empty((tile_height, tile_width, 4), dtype=np.uint8)
+                rgba_pixels[..., :3] = tile_pixels[..., :3]
+                rgba_pixels[..., 3] = tile_pixels[..., 3] if tile_pixels.shape[2] == 4 and not apply_palette else 255
                 
-                # Make green pixels transparent
-                if tile_img.mode == 'RGBA':
-                    data = tile_img.getdata()
-                    new_data = []
-                    for item in data:
-                        # Check if pixel is green (0, 255, 0) and make it transparent
-                        if item[0] == 0 and item[1] == 255 and item[2] == 0:
-                            new_data.append((0, 0, 0, 0))  # Transparent
-                        else:
-                            new_data.append(item)
-                    tile_img.putdata(new_data)
+                # Apply the palette and convert green (0, 255, 0) to transparent for proper layering,
+                # both in one pass over the tile's pixels
+                words = _rgb_words(rgba_pixels)
+                if apply_palette and custom_palette:
+                    _apply_palette_to_pixels(rgba_pixels, words, custom_palette, palette_array_index)
+                rgba_pixels[words == _GREEN_RGB_WORD] = 0  # Transparent
+                tile_img = Image.fromarray(rgba_pixels, 'RGBA')
                 
                 # Paste tile onto frame with alpha blending
                 frame_img.paste(tile_img, (tile_x, tile_y), tile_img)
@@ -515,50 +556,192 @@ def create_frame_image(base_image, frame_data, zoom_level=1, flip_left=False, cu
     # to ensure pixel-perfect scaling for all frames
     return frame_img
 
-def display_pixel_art(image, caption, max_width=400, zoom_level=1):
-    """Display pixel art with proper scaling and CSS to prevent blurring."""
-    temp_file_path, scaled_size = create_pixel_perfect_display(image, max_width, zoom_level)
-    
-    # Read the image data as base64
-    import base64
-    with open(temp_file_path, "rb") as img_file:
-        img_data = base64.b64encode(img_file.read()).decode()
-    
-    # Create HTML with proper image rendering
-    html = f"""
-    <div style="text-align: center;">
-        <img src="data:image/png;base64,{img_data}" 
-             style="image-rendering: pixelated; 
-                    image-rendering: -moz-crisp-edges; 
-                    image-rendering: crisp-edges; 
-                    image-rendering: -webkit-optimize-contrast; 
-                    image-rendering: optimize-contrast; 
-                    image-rendering: -ms-interpolation-mode: nearest-neighbor;
-                    max-width: 100%; 
-                    height: auto;"
-             alt="{caption}">
-        <p style="font-size: 0.8em; color: #666; margin-top: 5px;">{caption}</p>
-    </div>
+
+def _frame_source_pixels(pixel_cache: Dict[int, np.ndarray], base_image: Image.Image) -> np.ndarray:
     """
+    Get the RGB or RGBA pixel array GIF frames are cut from, converted once per processed image.
     
-    # Display the HTML
-    st.markdown(html, unsafe_allow_html=True)
+    `pixel_cache` maps the id of each image to its array; PIL images are not hashable.
+    """
+    pixels = pixel_cache.get(id(base_image))
+    if pixels is None:
+        source = base_image if base_image.mode in ('RGB', 'RGBA') else base_image.convert('RGBA')
+        pixels = pixel_cache[id(base_image)] = np.asarray(source)
+    return pixels
+
+
+def _crop_tile_pixels(pixels: np.ndarray, left: int, top: int, width: int, height: int) -> np.ndarray:
+    """Crop a tile from a pixel array like Image.crop, padding any area outside it with zeros."""
+    img_height, img_width = pixels.shape[:2]
+    if left >= 0 and top >= 0 and left + width <= img_width and top + height <= img_height:
+        return pixels[top:top + height, left:left + width]
     
-    # Clean up the temporary file
-    try:
-        os.unlink(temp_file_path)
-    except:
-        pass  # Ignore cleanup errors
+    tile_pixels = np.zeros((height, width, pixels.shape[2]), dtype=np.uint8)
+    src_left, src_top = max(left, 0), max(top, 0)
+    src_right, src_bottom = min(left + width, img_width), min(top + height, img_height)
+    if src_left < src_right and src_top < src_bottom:
+        tile_pixels[src_top - top:src_bottom - top, src_left - left:src_right - left] = \
+            pixels[src_top:src_bottom, src_left:src_right]
+    return tile_pixels
+
+
+# Keep pixel art crisp when the browser scales images
+PIXEL_ART_CSS = """
+<style>
+img {
+    image-rendering: pixelated;
+    image-rendering: -moz-crisp-edges;
+    image-rendering: crisp-edges;
+}
+</style>
+"""
+
+
+_SWATCH_HTML = ('<span title="{name} #{color}" style="display:inline-block;width:2.5em;height:1.5em;'
+                'margin-right:0.25em;border:1px solid #888;background:#{color}"></span>')
+
+
+def palette_swatches_html(background: str, palettes: List[List[str]], label: str) -> str:
+    """
+    Render a background color and palettes as one HTML block of color swatches.
+    
+    A single markdown element replaces a disabled color picker per color.
+    Raises ValueError for a color that is not 6 hex digits.
+    """
+    def swatch(name: str, color: str) -> str:
+        if len(color) != 6 or not _is_hex_rgb(color):
+            raise ValueError(f"Invalid hex color: {color}")
+        return _SWATCH_HTML.format(name=name, color=color)
+    
+    lines = [f"<p>Background: <code>#{background}</code><br>{swatch('Background', background)}</p>"]
+    for i, palette in enumerate(palettes):
+        swatches = ''.join(swatch(name, color) for name, color in zip(("Light", "Mid", "Dark"), palette))
+        lines.append(f"<p><b>{label} {i+1}:</b> <code>{', '.join(palette)}</code><br>{swatches}</p>")
+    return "\n".join(lines)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _encode_pixel_art(image_key: Tuple[bytes, str, Tuple[int, int]], _image: Image.Image, max_width: int,
+                      zoom_level: int) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Scale and PNG-encode an image, cached so reruns reuse unchanged previews.
+    
+    `image_key` identifies the image content; the image itself is not hashed by Streamlit.
+    """
+    return create_pixel_perfect_display(_image, max_width, zoom_level)
+
+
+def display_pixel_art(image, caption, max_width=400, zoom_level=1):
+    """Display pixel art at its scaled size; PIXEL_ART_CSS prevents blurring."""
+    # Palette images carry state beyond their raw bytes, so cache them as RGBA
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA')
+    image_key = (hashlib.blake2b(image.tobytes(), digest_size=16).digest(), image.mode, image.size)
+    png_bytes, scaled_size = _encode_pixel_art(image_key, image, max_width, zoom_level)
+    
+    # Streamlit serves the PNG bytes from its media endpoint as they are
+    st.image(png_bytes, caption=caption, width=scaled_size[0])
     
     return scaled_size
 
 
+@st.cache_data(show_spinner=False)
+def decode_png(png_bytes: bytes) -> Image.Image:
+    """Decode uploaded PNG bytes, cached so reruns do not decode the same upload again."""
+    image = Image.open(io.BytesIO(png_bytes))
+    image.load()
+    return image
+
+
+@st.cache_data(show_spinner=False)
+def decode_preview_png(png_bytes: bytes) -> Image.Image:
+    """Decode uploaded PNG bytes into the smallest mode that previews it faithfully."""
+    image = decode_png(png_bytes)
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA')
+    # Fully opaque alpha adds a quarter to every preview's resize and encode work
+    if image.mode == 'RGBA' and image.getchannel('A').getextrema()[0] == 255:
+        image = image.convert('RGB')
+    return image
+
+
+@st.cache_data(show_spinner=False)
+def decode_gbsres(gbsres_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """Parse uploaded GBSRES bytes, cached so reruns do not parse the same upload again."""
+    return load_gbsres_file(io.BytesIO(gbsres_bytes))
+
+
+@st.cache_data(show_spinner=False)
+def _extract_palette_cached(png_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """Extract the palette of uploaded PNG bytes, cached so reprocessing the same upload skips the scan."""
+    return extract_palette_from_image(decode_png(png_bytes))
+
+
+@st.cache_data(show_spinner=False)
+def _parse_palette_cached(palette_str: str) -> Dict[str, Any]:
+    """Parse a custom palette string, cached so reruns do not parse the same input again."""
+    return parse_palette_string(palette_str)
+
+
+# Sidebar parameter defaults, used to initialize the session and by "Clear All Settings"
+SESSION_DEFAULTS = {
+    'filename': "sprite",
+    'enable_rgb': True,
+    'enable_processing': True,
+    'tile_width': 8,
+    'tile_height': 16,
+    'hor_tiles': 1,
+    'vert_tiles': 1,
+    'layer_palettes': "1",
+    'zoom_level': 2,
+    'checksum': "TBD",
+    'create_gifs': True,
+    'quantize_15bit': True,
+    'enable_tile_deduplication': True,
+    'detail_log': False,
+}
+
+# Processing results dropped by "Clear All Settings"
+SESSION_RESULT_KEYS = ('processed_image', 'zip_bytes', 'metadata_json', 'animation_gifs', 'processing_success', 'output_log')
+
+
+def _clear_all_settings() -> None:
+    """Reset all parameters to their defaults and drop the processing results."""
+    st.session_state.update(SESSION_DEFAULTS)
+    st.session_state.gif_palette = ""
+    st.session_state.extracted_palette = None
+    st.session_state.state_types = ["fixed"]
+    _rebuild_state_type_editor()
+    # Clear processing results
+    for key in SESSION_RESULT_KEYS:
+        st.session_state.pop(key, None)
+
+
+def _add_state_type(state_type: str) -> None:
+    """Append a state type and rebuild the state type editor from the updated list."""
+    st.session_state.state_types.append(state_type)
+    _rebuild_state_type_editor()
+
+
+def _rebuild_state_type_editor() -> None:
+    """Show state_types in a new state type editor, dropping the edits held by the previous one."""
+    st.session_state.state_type_rows = list(st.session_state.state_types)
+    # A new key gives a new widget, even if the rows equal the previous ones
+    st.session_state.state_type_rev = st.session_state.get('state_type_rev', 0) + 1
+
+
+def _clear_output_log() -> None:
+    """Empty the processing output log."""
+    st.session_state.output_log = []
+
+
 def main():
     st.set_page_config(
         page_title="GB Studio Sprite Animator",
         page_icon="🎮",
         layout="wide"
     )
+    st.markdown(PIXEL_ART_CSS, unsafe_allow_html=True)
     
     st.title("🎮 GB Studio Sprite Animator")
     st.markdown("Convert PNG sprites to GB Studio animation format")
@@ -568,32 +751,8 @@ def main():
         st.header("⚙️ Parameters")
         
         # Initialize session state for parameters if not exists
-        if 'filename' not in st.session_state:
-            st.session_state.filename = "sprite"
-        if 'enable_rgb' not in st.session_state:
-            st.session_state.enable_rgb = True
-        if 'enable_processing' not in st.session_state:
-            st.session_state.enable_processing = True
-        if 'tile_width' not in st.session_state:
-            st.session_state.tile_width = 8
-        if 'tile_height' not in st.session_state:
-            st.session_state.tile_height = 16
-        if 'hor_tiles' not in st.session_state:
-            st.session_state.hor_tiles = 1
-        if 'vert_tiles' not in st.session_state:
-            st.session_state.vert_tiles = 1
-        if 'layer_palettes' not in st.session_state:
-            st.session_state.layer_palettes = "1"
-        if 'zoom_level' not in st.session_state:
-            st.session_state.zoom_level = 2
-        if 'checksum' not in st.session_state:
-            st.session_state.checksum = "TBD"
-        if 'create_gifs' not in st.session_state:
-            st.session_state.create_gifs = True
-        if 'quantize_15bit' not in st.session_state:
-            st.session_state.quantize_15bit = True
-        if 'enable_tile_deduplication' not in st.session_state:
-            st.session_state.enable_tile_deduplication = True
+        for key, value in SESSION_DEFAULTS.items():
+            st.session_state.setdefault(key, value)
         
         # Basic parameters
         st.subheader("Basic Settings")
@@ -624,33 +783,35 @@ def main():
         # Container for state types - initialize if not exists
         if 'state_types' not in st.session_state:
             st.session_state.state_types = ["fixed"]
+        # Rows the state type editor is built from. Only the add buttons and "Clear All Settings"
+        # change them; edits made in the editor go to state_types alone
+        st.session_state.setdefault('state_type_rows', list(st.session_state.state_types))
+        st.session_state.setdefault('state_type_rev', 0)
         
-        # State type buttons
+        # State type buttons; the callbacks run before the editor below is drawn
         col1, col2, col3 = st.columns(3)
         with col1:
-            if st.button("➕ Fixed", key="add_fixed"):
-                st.session_state.state_types.append("fixed")
-                st.rerun()
+            st.button("➕ Fixed", key="add_fixed", on_click=_add_state_type, args=("fixed",))
         with col2:
-            if st.button("➕ Multi", key="add_multi"):
-                st.session_state.state_types.append("multi")
-                st.rerun()
+            st.button("➕ Multi", key="add_multi", on_click=_add_state_type, args=("multi",))
         with col3:
-            if st.button("➕ Multi Movement", key="add_multi_movement"):
-                st.session_state.state_types.append("multi_movement")
-                st.rerun()
-        
-        # Display current state types
-        if st.session_state.state_types:
-            st.write("Current state types:")
-            for i, state in enumerate(st.session_state.state_types):
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.write(f"{i+1}. {state}")
-                with col2:
-                    if st.button("🗑️", key=f"remove_{i}"):
-                        st.session_state.state_types.pop(i)
-                        st.rerun()
+            st.button("➕ Multi Movement", key="add_multi_movement", on_click=_add_state_type, args=("multi_movement",))
+        
+        # Current state types as one editable table; rows can be deleted or re-typed in place.
+        # The editor keeps the user's edits across reruns, until a callback rebuilds it with a new key.
+        st.write("Current state types:")
+        edited_states = st.data_editor(
+            {"State type": st.session_state.state_type_rows},
+            num_rows="dynamic",
+            column_config={
+                "State type": st.column_config.SelectboxColumn(
+                    options=["fixed", "multi", "multi_movement"], required=True
+                )
+            },
+            use_container_width=True,
+            key=f"state_type_editor_{st.session_state.state_type_rev}"
+        )
+        st.session_state.state_types = [state for state in edited_states["State type"] if state]
         
         state_types = st.session_state.state_types
         
@@ -683,9 +844,12 @@ def main():
         create_gifs = st.checkbox("Create GIFs", value=st.session_state.create_gifs, help="Generate animated GIFs for debugging animations", key="create_gifs_input")
         enable_tile_deduplication = st.checkbox("Tile Deduplication", value=st.session_state.enable_tile_deduplication, help="Remove duplicate tiles to save memory by reusing identical tiles across layers, frames, and animations", key="enable_tile_deduplication_input")
         
+        detail_log = st.checkbox("Detailed Log", value=st.session_state.detail_log, help="Write per-frame layer and palette details to the processing output log", key="detail_log_input")
+        
         # Update session state for debug options
         st.session_state.create_gifs = create_gifs
         st.session_state.enable_tile_deduplication = enable_tile_deduplication
+        st.session_state.detail_log = detail_log
         
         # Show 15-bit mode only if GIFs are enabled
         if create_gifs:
@@ -717,21 +881,8 @@ def main():
                     key="extracted_palette_string"
                 )
                 
-                # Keep the existing visual display
-                st.write(f"Background: `#{bg_hex}`")
-                
-                for i, palette in enumerate(extracted['palettes']):
-                    st.write(f"**Extracted {i+1}:** `{', '.join(palette)}`")
-                    
-                    # Show all 3 colors horizontally
-                    if len(palette) >= 3:
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.color_picker(f"Light", value=f"#{palette[0]}", disabled=True, key=f"extracted_{i}_0")
-                        with col2:
-                            st.color_picker(f"Mid", value=f"#{palette[1]}", disabled=True, key=f"extracted_{i}_1")
-                        with col3:
-                            st.color_picker(f"Dark", value=f"#{palette[2]}", disabled=True, key=f"extracted_{i}_2")
+                # Keep the existing visual display, as one HTML block rather than a widget per color
+                st.markdown(palette_swatches_html(bg_hex, extracted['palettes'], "Extracted"), unsafe_allow_html=True)
             
             # Custom palette override
             st.write("**Custom Palette Override (optional):**")
@@ -746,65 +897,18 @@ def main():
             # Show custom palette preview
             if palette_input:
                 try:
-                    palette_colors = parse_palette_string(palette_input)
+                    palette_colors = _parse_palette_cached(palette_input)
                     if palette_colors:
                         st.write("**Custom Palette Preview:**")
-                        
-                        # Show background
-                        st.write(f"Background: `#{palette_colors['background']}`")
-                        col_bg = st.columns(1)
-                        with col_bg[0]:
-                            st.color_picker("Background", value=f"#{palette_colors['background']}", disabled=True, key="custom_bg")
-                        
-                        # Show each palette with all 3 colors
-                        for i, palette in enumerate(palette_colors['palettes']):
-                            st.write(f"**Custom {i+1}:** `{', '.join(palette)}`")
-                            
-                            # Show all 3 colors horizontally
-                            if len(palette) >= 3:
-                                col1, col2, col3 = st.columns(3)
-                                with col1:
-                                    st.color_picker(f"Light", value=f"#{palette[0]}", disabled=True, key=f"custom_{i}_0")
-                                with col2:
-                                    st.color_picker(f"Mid", value=f"#{palette[1]}", disabled=True, key=f"custom_{i}_1")
-                                with col3:
-                                    st.color_picker(f"Dark", value=f"#{palette[2]}", disabled=True, key=f"custom_{i}_2")
+                        st.markdown(palette_swatches_html(palette_colors['background'], palette_colors['palettes'], "Custom"), unsafe_allow_html=True)
                 except Exception as e:
                     st.error(f"Invalid palette format: {e}")
                     st.session_state.gif_palette = ''  # Reset to empty
         
         # Clear settings button
         st.subheader("Session Management")
-        if st.button("🗑️ Clear All Settings", help="Reset all parameters to default values"):
-            # Clear all session state parameters
-            st.session_state.filename = "sprite"
-            st.session_state.enable_rgb = True
-            st.session_state.enable_processing = True
-            st.session_state.tile_width = 8
-            st.session_state.tile_height = 16
-            st.session_state.hor_tiles = 1
-            st.session_state.vert_tiles = 1
-            st.session_state.layer_palettes = "1"
-            st.session_state.zoom_level = 2
-            st.session_state.checksum = "TBD"
-            st.session_state.create_gifs = True
-            st.session_state.quantize_15bit = True
-            st.session_state.enable_tile_deduplication = True
-            st.session_state.gif_palette = ""
-            st.session_state.extracted_palette = None
-            st.session_state.state_types = ["fixed"]
-            # Clear processing results
-            if 'processed_image' in st.session_state:
-                del st.session_state.processed_image
-            if 'zip_buffer' in st.session_state:
-                del st.session_state.zip_buffer
-            if 'animation_gifs' in st.session_state:
-                del st.session_state.animation_gifs
-            if 'processing_success' in st.session_state:
-                del st.session_state.processing_success
-            if 'output_log' in st.session_state:
-                del st.session_state.output_log
-            st.rerun()
+        # Resetting in a callback lets this run draw the defaults, with no second rerun
+        st.button("🗑️ Clear All Settings", help="Reset all parameters to default values", on_click=_clear_all_settings)
     
     # Main content area
     st.header("📁 Upload & Process Sprite")
@@ -831,13 +935,19 @@ def main():
         )
     
     if uploaded_png is not None:
-        # Display the uploaded image
-        image = Image.open(uploaded_png)
+        # Decode the uploaded image once per upload and reuse it on later reruns
+        if st.session_state.get('source_upload_id') != uploaded_png.file_id:
+            png_bytes = uploaded_png.getvalue()
+            st.session_state.source_png_bytes = png_bytes
+            st.session_state.source_image = decode_png(png_bytes)
+            st.session_state.preview_image = decode_preview_png(png_bytes)
+            st.session_state.source_upload_id = uploaded_png.file_id
+        image = st.session_state.source_image
         
         # Load GBSRES data if provided
         gbsres_data = None
         if uploaded_gbsres is not None:
-            gbsres_data = load_gbsres_file(uploaded_gbsres)
+            gbsres_data = decode_gbsres(uploaded_gbsres.getvalue())
             if gbsres_data:
                 st.success("✅ GBSRES template loaded successfully!")
             else:
@@ -852,23 +962,34 @@ def main():
             if st.button("🚀 Process Sprite", type="primary", use_container_width=True):
                 with st.spinner("Processing sprite..."):
                     try:
-                        # Clear output log at start of processing
-                        st.session_state.output_log = []
-                        st.session_state.output_log.append(f"🚀 Starting sprite processing for '{filename}'")
-                        st.session_state.output_log.append(f"📊 Parameters: RGB={enable_rgb}, Processing={enable_processing}")
-                        st.session_state.output_log.append(f"🔧 Tile settings: {tile_width}x{tile_height}, {hor_tiles}x{vert_tiles} tiles per frame")
-                        st.session_state.output_log.append(f"🎬 State types: {', '.join(state_types)}")
-                        st.session_state.output_log.append(f"🎨 Layer palettes: {layer_palettes}")
+                        # Clear output log at start of processing; the helpers below append to the same list
+                        log = st.session_state.output_log = []
+                        log.append(f"🚀 Starting sprite processing for '{filename}'")
+                        log.append(f"📊 Parameters: RGB={enable_rgb}, Processing={enable_processing}")
+                        log.append(f"🔧 Tile settings: {tile_width}x{tile_height}, {hor_tiles}x{vert_tiles} tiles per frame")
+                        log.append(f"🎬 State types: {', '.join(state_types)}")
+                        log.append(f"🎨 Layer palettes: {layer_palettes}")
                         
                         # Prepare parameters
-                        params = f"fname={filename} processing={enable_processing} rgb={'y' if enable_rgb else 'n'} twidth={tile_width} theight={tile_height} htiles={hor_tiles} vtiles={vert_tiles} states={','.join(state_types)} palettes={layer_palettes} chksum={checksum}"
+                        params = {
+                            'fname': filename,
+                            'processing': enable_processing,
+                            'rgb': enable_rgb,
+                            'twidth': tile_width,
+                            'theight': tile_height,
+                            'htiles': hor_tiles,
+                            'vtiles': vert_tiles,
+                            'states': state_types,
+                            'palettes': layer_palettes,
+                            'chksum': checksum
+                        }
                         
                         # Process the image with optional GBSRES template
                         processed_image = process(image, gbsres_data, params)
                         
                         # Apply tile deduplication if enabled
                         if enable_tile_deduplication:
-                            st.session_state.output_log.append("🔧 Applying tile deduplication...")
+                            log.append("🔧 Applying tile deduplication...")
                             processed_image = tile_deduplication.process(processed_image)
                             
                             # Log deduplication results
@@ -878,105 +999,117 @@ def main():
                                     total_tiles = dedup_info.get('total_tiles', 0)
                                     unique_tiles = dedup_info.get('unique_tiles', 0)
                                     duplicate_tiles = dedup_info.get('duplicate_tiles', 0)
-                                    st.session_state.output_log.append(f"📊 Tile deduplication results:")
-                                    st.session_state.output_log.append(f"  Total tiles: {total_tiles}")
-                                    st.session_state.output_log.append(f"  Unique tiles: {unique_tiles}")
-                                    st.session_state.output_log.append(f"  Duplicate tiles removed: {duplicate_tiles}")
+                                    log.append(f"📊 Tile deduplication results:")
+                                    log.append(f"  Total tiles: {total_tiles}")
+                                    log.append(f"  Unique tiles: {unique_tiles}")
+                                    log.append(f"  Duplicate tiles removed: {duplicate_tiles}")
                                     if total_tiles > 0:
                                         savings_percent = (duplicate_tiles / total_tiles) * 100
-                                        st.session_state.output_log.append(f"  Memory savings: {savings_percent:.1f}%")
+                                        log.append(f"  Memory savings: {savings_percent:.1f}%")
                         else:
-                            st.session_state.output_log.append("🔧 Tile deduplication disabled")
+                            log.append("🔧 Tile deduplication disabled")
                         
                         # Add processing completion to log
-                        st.session_state.output_log.append("✅ Sprite processing completed successfully")
+                        log.append("✅ Sprite processing completed successfully")
                         
                         # Store processed image in session state
                         st.session_state.processed_image = processed_image
-                        st.session_state.zip_buffer = create_zip_file(processed_image, filename, enable_rgb)
+                        # Format the metadata once, for both the ZIP and the metadata view
+                        metadata_json = None
+                        extra_data = getattr(processed_image, 'extra_data', None)
+                        if isinstance(extra_data, dict):
+                            metadata_json = json.dumps(extra_data, indent=2)
+                            st.session_state.metadata_json = metadata_json
+                        st.session_state.zip_bytes = create_zip_file(processed_image, filename, enable_rgb, metadata_json).getvalue()
                         st.session_state.processing_success = True
                         
                         # Extract palette from input image for GIF visualization and layer processing
-                        st.session_state.output_log.append("🎨 Extracting palette from input image...")
-                        extracted_palette = extract_palette_from_image(image)
+                        log.append("🎨 Extracting palette from input image...")
+                        extracted_palette = _extract_palette_cached(st.session_state.source_png_bytes)
                         st.session_state.extracted_palette = extracted_palette
                         
                         # Log extracted palette information
                         if extracted_palette:
-                            st.session_state.output_log.append(f"📋 Auto-extracted background: #{extracted_palette['background']}")
-                            st.session_state.output_log.append(f"📋 Found {len(extracted_palette['palettes'])} palettes in image")
+                            log.append(f"📋 Auto-extracted background: #{extracted_palette['background']}")
+                            log.append(f"📋 Found {len(extracted_palette['palettes'])} palettes in image")
                             for i, palette in enumerate(extracted_palette['palettes']):
-                                st.session_state.output_log.append(f"📋 Auto-extracted palette {i+1}: {', '.join(palette)}")
+                                log.append(f"📋 Auto-extracted palette {i+1}: {', '.join(palette)}")
                             
                             # Log layer configuration
-                            layer_count = len(layer_palettes.split(','))
-                            st.session_state.output_log.append(f"🎨 Configured for {layer_count} layers: {layer_palettes}")
+                            layer_palette_ids = layer_palettes.split(',')
+                            layer_count = len(layer_palette_ids)
+                            log.append(f"🎨 Configured for {layer_count} layers: {layer_palettes}")
                             
                             # Map palette indices to array indices
-                            palette_indices = [int(x.strip()) for x in layer_palettes.split(',')]
-                            st.session_state.output_log.append(f"🎨 Palette indices: {palette_indices}")
+                            palette_indices = [int(x) for x in layer_palette_ids]
+                            log.append(f"🎨 Palette indices: {palette_indices}")
                             
                             # Check if palette indices are valid
                             max_palette_index = max(palette_indices) if palette_indices else 0
                             if max_palette_index > len(extracted_palette['palettes']):
-                                st.session_state.output_log.append(f"⚠️ Warning: Palette index {max_palette_index} exceeds available palettes ({len(extracted_palette['palettes'])})")
-                                st.session_state.output_log.append("💡 Some layers will fall back to available palettes")
+                                log.append(f"⚠️ Warning: Palette index {max_palette_index} exceeds available palettes ({len(extracted_palette['palettes'])})")
+                                log.append("💡 Some layers will fall back to available palettes")
                         else:
-                            st.session_state.output_log.append("⚠️ Could not extract palette from image")
+                            log.append("⚠️ Could not extract palette from image")
                         
                         # Create GIFs if enabled
                         if create_gifs:
                             
                             # Determine which palette to use
                             palette_to_use = None
-                            if 'gif_palette' in st.session_state and st.session_state.gif_palette:
-                                st.session_state.output_log.append("🎨 Using custom palette override...")
+                            gif_palette = st.session_state.get('gif_palette', '')
+                            if gif_palette:
+                                log.append("🎨 Using custom palette override...")
                                 # Use custom palette if provided
                                 try:
-                                    palette_to_use = parse_palette_string(st.session_state.gif_palette)
-                                    st.session_state.output_log.append(f"📋 Custom background: #{palette_to_use['background']}")
+                                    palette_to_use = _parse_palette_cached(gif_palette)
+                                    log.append(f"📋 Custom background: #{palette_to_use['background']}")
                                     for i, palette in enumerate(palette_to_use['palettes']):
-                                        st.session_state.output_log.append(f"📋 Custom palette {i+1}: {', '.join(palette)}")
+                                        log.append(f"📋 Custom palette {i+1}: {', '.join(palette)}")
                                 except Exception as e:
                                     st.warning(f"Invalid custom palette format: {e}. Using auto-extracted palette.")
-                                    st.session_state.output_log.append(f"⚠️ Invalid custom palette: {e}, falling back to auto-extracted")
+                                    log.append(f"⚠️ Invalid custom palette: {e}, falling back to auto-extracted")
                                     palette_to_use = extracted_palette
                             else:
-                                st.session_state.output_log.append("🎨 Using auto-extracted palette")
+                                log.append("🎨 Using auto-extracted palette")
                                 # Use auto-extracted palette
                                 palette_to_use = extracted_palette
                             
-                            st.session_state.output_log.append("🎬 Creating animation GIFs...")
-                            st.session_state.animation_gifs = create_animation_gifs(processed_image, zoom_level, palette_to_use, st.session_state.get('quantize_15bit', False))
+                            log.append("🎬 Creating animation GIFs...")
+                            animation_gifs = create_animation_gifs(processed_image, zoom_level, palette_to_use, st.session_state.get('quantize_15bit', False))
+                            st.session_state.animation_gifs = animation_gifs
                             
                             # Log GIF creation results
-                            if st.session_state.animation_gifs:
-                                st.session_state.output_log.append(f"✅ Created {len(st.session_state.animation_gifs)} animation GIFs")
-                                for gif_name, gif_info in st.session_state.animation_gifs.items():
-                                    st.session_state.output_log.append(f"  🎬 {gif_name}: {gif_info['frame_count']} frames, type={gif_info['state_type']}")
+                            if animation_gifs:
+                                log.append(f"✅ Created {len(animation_gifs)} animation GIFs")
+                                for gif_name, gif_info in animation_gifs.items():
+                                    log.append(f"  🎬 {gif_name}: {gif_info['frame_count']} frames, type={gif_info['state_type']}")
                             else:
-                                st.session_state.output_log.append("⚠️ No animations found to create GIFs from")
+                                log.append("⚠️ No animations found to create GIFs from")
                         else:
-                            st.session_state.output_log.append("🎬 GIF creation disabled")
+                            log.append("🎬 GIF creation disabled")
                             st.session_state.animation_gifs = {}
                             st.session_state.extracted_palette = None
                         
-                        st.rerun()  # Refresh to show the processed image
-                        
+                        # The sidebar has already drawn the previous extracted palette in this run
+                        st.rerun()
                     except Exception as e:
                         st.error(f"❌ Error processing image: {str(e)}")
-                        st.session_state.output_log.append(f"❌ ERROR: {str(e)}")
+                        log.append(f"❌ ERROR: {str(e)}")
                         st.session_state.processing_success = False
         
+        # Whether a successful processing result is available, read once for the sections below
+        processing_succeeded = 'processed_image' in st.session_state and st.session_state.get('processing_success', False)
+        
         with col2:
-            if 'processed_image' in st.session_state and st.session_state.get('processing_success', False):
+            if processing_succeeded:
                 st.success("✅ Processing completed!")
         
         with col3:
-            if 'zip_buffer' in st.session_state and st.session_state.get('processing_success', False):
+            if processing_succeeded and 'zip_bytes' in st.session_state:
                 st.download_button(
                     label="📦 Download ZIP",
-                    data=st.session_state.zip_buffer.getvalue(),
+                    data=st.session_state.zip_bytes,
                     file_name=f"{filename}_gbstudio.zip",
                     mime="application/zip",
                     use_container_width=True
@@ -988,7 +1121,7 @@ def main():
         
         with col1:
             st.markdown("**📤 Input Image**")
-            scaled_size = display_pixel_art(image, f"Original Image (x{zoom_level})", zoom_level=zoom_level)
+            scaled_size = display_pixel_art(st.session_state.preview_image, f"Original Image (x{zoom_level})", zoom_level=zoom_level)
             st.info(f"Original size: {image.size[0]}x{image.size[1]} pixels | Display zoom: x{zoom_level}")
         
         with col2:
@@ -1018,30 +1151,28 @@ def main():
                         if gif_info['flip_left']:
                             st.markdown("*Flipped Left*")
                         
-                        # Display the GIF at its native size to prevent browser scaling
+                        # The GIF is stored at sprite size; the browser enlarges it pixelated (see PIXEL_ART_CSS)
                         try:
-                            with open(gif_info['path'], 'rb') as gif_file:
-                                gif_data = gif_file.read()
-                                # Display at native size to prevent browser upscaling
-                                st.image(gif_data, width=None, use_container_width=False)
+                            st.image(gif_info['data'], width=gif_info['display_width'])
                         except Exception as e:
                             st.error(f"Could not display GIF: {e}")
             else:
                 st.info("No animations found to create GIFs from.")
         
         # GBSRES metadata display (collapsed by default)
-        if 'processed_image' in st.session_state and st.session_state.get('processing_success', False):
+        if processing_succeeded:
             processed_image = st.session_state.processed_image
             
             with st.expander("📄 Generated GBSRES Metadata", expanded=False):
                 if hasattr(processed_image, 'extra_data') and processed_image.extra_data:
                     if isinstance(processed_image.extra_data, str):
                         st.info(f"Processing info: {processed_image.extra_data}")
-                    else:
-                        st.json(processed_image.extra_data)
+                    elif 'metadata_json' in st.session_state:
+                        # Formatted once when the sprite was processed, not on every rerun
+                        st.code(st.session_state.metadata_json, language='json')
         
         # Processing output log (read-only debug section)
-        if 'processed_image' in st.session_state and st.session_state.get('processing_success', False):
+        if processing_succeeded:
             st.subheader("📋 Processing Output Log")
             
             # Initialize session state for output log if not exists
@@ -1059,10 +1190,8 @@ def main():
                 help="Shows processing debug information including layer palette details"
             )
             
-            # Clear log button
-            if st.button("🗑️ Clear Log", help="Clear the processing output log"):
-                st.session_state.output_log = []
-                st.rerun()
+            # Clear log button; the callback runs before the log above is drawn
+            st.button("🗑️ Clear Log", help="Clear the processing output log", on_click=_clear_output_log)
     
     else:
         st.info("👆 Please upload a PNG file to begin processing")
@@ -1148,29 +1277,38 @@ def main():
         """)
 
 
-def create_zip_file(processed_image, filename, enable_rgb):
-    """Create a ZIP file with the proper folder structure."""
+def create_zip_file(processed_image, filename, enable_rgb, metadata_json=None):
+    """Create a ZIP file with the proper folder structure.
+    
+    metadata_json is the extra_data already formatted as JSON, if the caller has it.
+    """
     zip_buffer = io.BytesIO()
     
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add the processed PNG to assets/sprites/
-        png_buffer = io.BytesIO()
-        processed_image.save(png_buffer, format='PNG')
-        png_buffer.seek(0)
-        zip_file.writestr(f"assets/sprites/{filename}.png", png_buffer.getvalue())
+        # Add the processed PNG to assets/sprites/, streamed straight into the archive.
+        # PNG data is already deflated, so it is stored rather than compressed again.
+        png_info = _zip_entry_info(f"assets/sprites/{filename}.png", zipfile.ZIP_STORED)
+        with zip_file.open(png_info, 'w') as png_file:
+            processed_image.save(png_file, format='PNG')
         
         # Add the JSON metadata to project/sprites/
         if hasattr(processed_image, 'extra_data') and processed_image.extra_data:
             if isinstance(processed_image.extra_data, dict):
-                json_buffer = io.BytesIO()
-                json_str = json.dumps(processed_image.extra_data, indent=2)
-                json_buffer.write(json_str.encode('utf-8'))
-                json_buffer.seek(0)
-                zip_file.writestr(f"project/sprites/{filename}.gbsres", json_buffer.getvalue())
+                json_str = metadata_json if metadata_json is not None else json.dumps(processed_image.extra_data, indent=2)
+                json_info = _zip_entry_info(f"project/sprites/{filename}.gbsres", zipfile.ZIP_DEFLATED)
+                with zip_file.open(json_info, 'w') as json_file:
+                    json_file.write(json_str.encode('utf-8'))
     
     zip_buffer.seek(0)
     return zip_buffer
 
 
+def _zip_entry_info(name: str, compress_type: int) -> zipfile.ZipInfo:
+    """Create ZIP entry info stamped with the current time, as ZipFile.writestr would."""
+    zip_info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    zip_info.compress_type = compress_type
+    return zip_info
+
+
 if __name__ == "__main__":
     main()
@@ -1,6 +1,6 @@
-from datetime import datetime
+import time
 
 
 def dtime_str() -> str:
     """Generate a datetime string for timestamps."""
-    return datetime.now().strftime("%Y%m%d_%H%M%S")
+    return time.strftime("%Y%m%d_%H%M%S")
@@ -20,7 +20,9 @@ def run_all_tests():
     test_suites = [
         ("RGB to 3-Color Layers", "test_spr_rgb_to_3color_layers"),
         ("GB Studio Animation O1", "test_spr_png_to_gbstudio_anim_o1"), 
-        ("GB Studio Animation with GBSRES", "test_spr_png_to_gbstudio_anim")
+        ("GB Studio Animation with GBSRES", "test_spr_png_to_gbstudio_anim"),
+        ("Tile Deduplication", "test_tile_deduplication"),
+        ("App State Type Editor", "test_app_state_type_editor")
     ]
     
     total_tests = 0
@@ -40,8 +42,9 @@ def run_all_tests():
             suite = loader.loadTestsFromModule(module)
             
             # Run tests
-            runner = unittest.TextTestRunner(verbosity=1, stream=open(os.devnull, 'w'))
-            result = runner.run(suite)
+            with open(os.devnull, 'w') as null_stream:
+                runner = unittest.TextTestRunner(verbosity=1, stream=null_stream)
+                result = runner.run(suite)
             
             # Collect results
             tests_run = result.testsRun
@@ -8,6 +8,9 @@ import sys
 import os
 from PIL import Image
 import io
+import json
+import zipfile
+import numpy as np
 
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -38,13 +41,13 @@ def test_processing():
     print("🧪 Testing GB Studio Sprite Processing...")
     
     # Create a simple test image (32x32 pixels, green background)
-    test_image = Image.new('RGB', (32, 32), (0, 255, 0))
+    pixels = np.empty((32, 32, 3), dtype=np.uint8)
+    pixels[:] = (0, 255, 0)
     
-    # Add some test pixels
-    for x in range(8):
-        for y in range(16):
-            if (x + y) % 2 == 0:
-                test_image.putpixel((x, y), (255, 0, 0))  # Red pixel
+    # Add some test pixels: a red checkerboard in the first 8x16 tile
+    pixels[0:16:2, 0:8:2] = (255, 0, 0)  # Red pixel
+    pixels[1:16:2, 1:8:2] = (255, 0, 0)
+    test_image = Image.fromarray(pixels, 'RGB')
     
     print(f"✅ Created test image: {test_image.size}")
     
@@ -84,26 +87,21 @@ def test_processing():
 
 def create_test_zip(processed_image, filename):
     """Create a test ZIP file with the proper folder structure."""
-    import zipfile
-    
     zip_buffer = io.BytesIO()
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add the processed PNG to assets/sprites/
-        png_buffer = io.BytesIO()
-        processed_image.save(png_buffer, format='PNG')
-        png_buffer.seek(0)
-        zip_file.writestr(f"assets/sprites/{filename}.png", png_buffer.getvalue())
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        # Add the processed PNG to assets/sprites/, streamed straight into the archive.
+        # PNG data is already deflated, so it is stored rather than compressed again.
+        png_info = zipfile.ZipInfo(f"assets/sprites/{filename}.png")
+        png_info.compress_type = zipfile.ZIP_STORED
+        with zip_file.open(png_info, 'w') as png_file:
+            processed_image.save(png_file, format='PNG', compress_level=1)
         
         # Add the JSON metadata to project/sprites/
         if hasattr(processed_image, 'extra_data') and processed_image.extra_data:
             if isinstance(processed_image.extra_data, dict):
-                import json
-                json_buffer = io.BytesIO()
-                json_str = json.dumps(processed_image.extra_data, indent=2)
-                json_buffer.write(json_str.encode('utf-8'))
-                json_buffer.seek(0)
-                zip_file.writestr(f"project/sprites/{filename}.gbsres", json_buffer.getvalue())
+                with zip_file.open(f"project/sprites/{filename}.gbsres", 'w') as json_file:
+                    json_file.write(json.dumps(processed_image.extra_data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
     
     zip_buffer.seek(0)
     return zip_buffer
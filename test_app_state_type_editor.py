@@ -0,0 +1,93 @@
+"""
+Test suite for the state type editor in app.py - the sidebar list of animation state types.
+
+Tests how edits made in the state type data editor combine with:
+- Consecutive edits in the same editor
+- The add state type buttons
+- The "Clear All Settings" button
+"""
+
+import unittest
+import os
+import json
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+class TestAppStateTypeEditor(unittest.TestCase):
+    """Test cases for the state type editor in app.py."""
+
+    def setUp(self):
+        """Start a fresh app session with the default state types."""
+        self.app = AppTest.from_file(APP_PATH, default_timeout=60)
+        self.app.run()
+        self.editor_id = self._find_editor_id()
+        self.editor_edits = None
+
+    def _find_editor_id(self):
+        """Get the widget id of the state type editor."""
+        return next(element.proto.id for element in self.app.sidebar if type(element).__name__ == 'Dataframe')
+
+    def _rerun(self, edited_rows=None, added_rows=None, deleted_rows=None, click=None):
+        """
+        Rerun the app the way the browser does.
+
+        AppTest cannot edit a data editor, so the widget states are sent directly: the mounted
+        editor resends all of its edits on every rerun, until the app replaces it with a new one.
+        """
+        if edited_rows is not None or added_rows is not None or deleted_rows is not None:
+            self.editor_edits = {
+                "edited_rows": edited_rows or {},
+                "added_rows": added_rows or [],
+                "deleted_rows": deleted_rows or []
+            }
+
+        widget_states = self.app._tree.get_widget_states()
+        if click:
+            button = next(button for button in self.app.button if click in button.label)
+            widget = widget_states.widgets.add()
+            widget.id = button.id
+            widget.trigger_value = True
+        if self.editor_edits is not None:
+            widget = widget_states.widgets.add()
+            widget.id = self.editor_id
+            widget.string_value = json.dumps(self.editor_edits)
+        self.app._run(widget_states)
+        self.assertEqual(len(self.app.exception), 0)
+
+        # A replaced editor starts without edits
+        editor_id = self._find_editor_id()
+        if editor_id != self.editor_id:
+            self.editor_id = editor_id
+            self.editor_edits = None
+        return self.app.session_state.state_types
+
+    def test_consecutive_edits(self):
+        """Test that a second edit in the same editor keeps the first one."""
+        self.assertEqual(self._rerun(edited_rows={"0": {"State type": "multi"}}), ["multi"])
+        self.assertEqual(self._rerun(edited_rows={"0": {"State type": "multi"}},
+                                     added_rows=[{"State type": "multi_movement"}]),
+                         ["multi", "multi_movement"])
+        self.assertEqual(self._rerun(), ["multi", "multi_movement"])
+
+    def test_add_after_delete(self):
+        """Test that adding a state type after deleting all rows is not undone by the old deletion."""
+        self.assertEqual(self._rerun(deleted_rows=[0]), [])
+        self.assertEqual(self._rerun(click="➕ Fixed"), ["fixed"])
+        self.assertEqual(self._rerun(), ["fixed"])
+
+    def test_add_keeps_edits(self):
+        """Test that an added state type goes after the edited rows."""
+        self._rerun(edited_rows={"0": {"State type": "multi_movement"}})
+        self.assertEqual(self._rerun(click="➕ Multi"), ["multi_movement", "multi"])
+
+    def test_clear_all_after_edit(self):
+        """Test that "Clear All Settings" resets edited state types."""
+        self.assertEqual(self._rerun(edited_rows={"0": {"State type": "multi"}}), ["multi"])
+        self.assertEqual(self._rerun(click="Clear All Settings"), ["fixed"])
+        self.assertEqual(self._rerun(), ["fixed"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
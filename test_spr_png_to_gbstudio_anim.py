@@ -10,8 +10,8 @@ Tests the core GB Studio animation processing functionality including:
 
 import unittest
 import os
+import io
 import json
-import tempfile
 from PIL import Image
 
 # Import the module to test
@@ -21,19 +21,21 @@ from algorithms.spr_png_to_gbstudio_anim import process, load_gbsres_file
 class TestSprPngToGBStudioAnim(unittest.TestCase):
     """Test cases for spr_png_to_gbstudio_anim.py - GB Studio animation generation with GBSRES template support."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.test_image_path = "input/test/assets/sprites/chicken_fighter_full.png"
-        self.test_gbsres_path = "input/test/project/sprites/chicken_fighter_full.gbsres"
-        self.test_image = None
-        self.test_gbsres_data = None
-        
-        if os.path.exists(self.test_image_path):
-            self.test_image = Image.open(self.test_image_path)
-        
-        if os.path.exists(self.test_gbsres_path):
-            with open(self.test_gbsres_path, 'r') as f:
-                self.test_gbsres_data = json.load(f)
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures, decoding the test image and GBSRES file once for all tests."""
+        cls.test_image_path = "input/test/assets/sprites/chicken_fighter_full.png"
+        cls.test_gbsres_path = "input/test/project/sprites/chicken_fighter_full.gbsres"
+        cls.test_image = None
+        cls.test_gbsres_data = None
+        
+        if os.path.exists(cls.test_image_path):
+            cls.test_image = Image.open(cls.test_image_path)
+            cls.test_image.load()
+        
+        if os.path.exists(cls.test_gbsres_path):
+            with open(cls.test_gbsres_path, 'r') as f:
+                cls.test_gbsres_data = json.load(f)
     
     def test_process_without_gbsres_template(self):
         """Test processing without GBSRES template."""
@@ -116,21 +118,16 @@ class TestSprPngToGBStudioAnim(unittest.TestCase):
         if not self.test_gbsres_data:
             self.skipTest("Test GBSRES data not available")
         
-        # Create a temporary file with GBSRES data
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.gbsres', delete=False) as f:
-            json.dump(self.test_gbsres_data, f)
-            temp_file_path = f.name
-        
-        try:
-            with open(temp_file_path, 'r') as f:
-                result = load_gbsres_file(f)
-            
-            self.assertIsNotNone(result)
-            self.assertIsInstance(result, dict)
-            self.assertEqual(result['_resourceType'], 'sprite')
-            self.assertEqual(result['id'], self.test_gbsres_data['id'])
-        finally:
-            os.unlink(temp_file_path)
+        # Text and binary file-like objects, as read from disk and from an upload
+        gbsres_json = json.dumps(self.test_gbsres_data)
+        for gbsres_file in (io.StringIO(gbsres_json), io.BytesIO(gbsres_json.encode('utf-8'))):
+            with self.subTest(file_type=type(gbsres_file).__name__):
+                result = load_gbsres_file(gbsres_file)
+                
+                self.assertIsNotNone(result)
+                self.assertIsInstance(result, dict)
+                self.assertEqual(result['_resourceType'], 'sprite')
+                self.assertEqual(result['id'], self.test_gbsres_data['id'])
     
     def test_load_gbsres_file_invalid(self):
         """Test loading an invalid GBSRES file."""
@@ -185,6 +182,47 @@ class TestSprPngToGBStudioAnim(unittest.TestCase):
                 self.assertEqual(result.extra_data["canvasWidth"], expected_canvas_width)
                 self.assertEqual(result.extra_data["canvasHeight"], expected_canvas_height)
     
+    def test_process_with_params_dict(self):
+        """Test that a params dict gives the same result as the equivalent params string."""
+        if not self.test_image:
+            self.skipTest("Test image not available")
+
+        params_str = "fname=test_sprite processing=True rgb=y twidth=8 theight=16 htiles=2 vtiles=1 states=fixed,multi#f palettes=2,1"
+        params_dict = {
+            'fname': 'test_sprite', 'processing': True, 'rgb': True, 'twidth': 8, 'theight': 16,
+            'htiles': 2, 'vtiles': 1, 'states': ['fixed', 'multi#f'], 'palettes': '2,1'
+        }
+        result_str = process(self.test_image, None, params_str)
+        result_dict = process(self.test_image, None, params_dict)
+
+        self.assertEqual(result_dict.tobytes(), result_str.tobytes())
+        self.assertFalse(result_dict.no_save)
+        self.assertEqual(result_dict.extra_data['name'], 'test_sprite')
+        self.assertEqual(result_dict.extra_data['numFrames'], result_str.extra_data['numFrames'])
+        self.assertEqual([state['animationType'] for state in result_dict.extra_data['states']],
+                         [state['animationType'] for state in result_str.extra_data['states']])
+
+    def test_process_with_params_dict_rgb_disabled(self):
+        """Test that a params dict only enables RGB processing for 'y' or True, and is left unchanged."""
+        if not self.test_image:
+            self.skipTest("Test image not available")
+
+        params_str = "fname=test_sprite processing=True rgb=n twidth=8 theight=16 htiles=1 vtiles=1 states=fixed palettes=1"
+        result_str = process(self.test_image, None, params_str)
+
+        for rgb in ('n', False, 1):
+            with self.subTest(rgb=rgb):
+                params_dict = {
+                    'fname': 'test_sprite', 'processing': True, 'rgb': rgb, 'twidth': 8, 'theight': 16,
+                    'htiles': 1, 'vtiles': 1, 'states': ['fixed'], 'palettes': '1'
+                }
+                params_before = dict(params_dict)
+                result_dict = process(self.test_image, None, params_dict)
+
+                self.assertTrue(result_dict.no_save)
+                self.assertEqual(result_dict.tobytes(), result_str.tobytes())
+                self.assertEqual(params_dict, params_before)
+
     def test_process_error_handling_invalid_image(self):
         """Test error handling for invalid image type."""
         with self.assertRaises(TypeError):
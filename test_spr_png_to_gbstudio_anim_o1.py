@@ -12,6 +12,8 @@ Tests the core GB Studio animation processing functionality including:
 import unittest
 import os
 import json
+import uuid
+import numpy as np
 from PIL import Image
 from typing import Dict, Any
 
@@ -22,25 +24,30 @@ from algorithms._spr_png_to_gbstudio_anim_o1 import process as gbstudio_anim_pro
 class TestSprPngToGBStudioAnimO1(unittest.TestCase):
     """Test cases for _spr_png_to_gbstudio_anim_o1.py - GB Studio animation generation."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.test_image_path = "input/test/assets/sprites/chicken_fighter_full.png"
-        self.test_image = None
-        if os.path.exists(self.test_image_path):
-            self.test_image = Image.open(self.test_image_path)
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures, decoding the test image and expected output once for all tests."""
+        cls.test_image_path = "input/test/assets/sprites/chicken_fighter_full.png"
+        cls.test_image = None
+        cls.test_image_rgb = None
+        if os.path.exists(cls.test_image_path):
+            cls.test_image = Image.open(cls.test_image_path)
+            cls.test_image.load()
+            cls.test_image_rgb = cls.test_image if cls.test_image.mode == 'RGB' else cls.test_image.convert('RGB')
+        
+        cls.expected_json_path = "input/test/project/sprites/chicken_fighter_full.gbsres"
+        cls.expected_data = None
+        if os.path.exists(cls.expected_json_path):
+            with open(cls.expected_json_path, 'r') as f:
+                cls.expected_data = json.load(f)
     
     def test_interleave_function(self):
         """Test the interleave function."""
-        # Create test image
-        test_img = Image.new('RGB', (8, 32), (0, 255, 0))  # 4 rows of 8 pixels each
-        
-        # Fill with test pattern
-        for y in range(32):
-            for x in range(8):
-                if y < 16:  # First 2 rows (A section)
-                    test_img.putpixel((x, y), (255, 0, 0))  # Red
-                else:  # Next 2 rows (B section)
-                    test_img.putpixel((x, y), (0, 0, 255))  # Blue
+        # Create test image: 4 rows of 8 pixels each
+        pixels = np.empty((32, 8, 3), dtype=np.uint8)
+        pixels[:16] = (255, 0, 0)  # First 2 rows (A section): red
+        pixels[16:] = (0, 0, 255)  # Next 2 rows (B section): blue
+        test_img = Image.fromarray(pixels, 'RGB')
         
         result = interleave(test_img, tile_height=8, vert_tiles_per_frame=2)
         
@@ -53,27 +60,23 @@ class TestSprPngToGBStudioAnimO1(unittest.TestCase):
         # So A0 (red) should be at y=0-15, B0 (blue) should be at y=16-31
         
         # Check A0 (first 16 rows should be red)
-        for y in range(0, 16):
-            for x in range(8):
-                self.assertEqual(result.getpixel((x, y)), (255, 0, 0))
+        result_pixels = np.asarray(result)
+        np.testing.assert_array_equal(result_pixels[:16], np.broadcast_to((255, 0, 0), (16, 8, 3)))
         
         # Check B0 (next 16 rows should be blue)
-        for y in range(16, 32):
-            for x in range(8):
-                self.assertEqual(result.getpixel((x, y)), (0, 0, 255))
+        np.testing.assert_array_equal(result_pixels[16:], np.broadcast_to((0, 0, 255), (16, 8, 3)))
     
     def test_json_structure_generation(self):
         """Test JSON structure generation."""
         if not self.test_image:
             self.skipTest("Test image not available")
         
-        # Convert to RGB if needed
-        if self.test_image.mode != 'RGB':
-            self.test_image = self.test_image.convert('RGB')
+        # Use the RGB conversion made once in setUpClass
+        test_image = self.test_image_rgb
         
         # Test with basic parameters
         params = "fname=test_sprite.png twidth=8 theight=16 states=fixed htiles=1 vtiles=1 palettes=1"
-        result = gbstudio_anim_process(self.test_image, params)
+        result = gbstudio_anim_process(test_image, params)
         
         # Check that extra_data contains JSON
         self.assertIsNotNone(result.extra_data)
@@ -103,16 +106,15 @@ class TestSprPngToGBStudioAnimO1(unittest.TestCase):
         if not self.test_image:
             self.skipTest("Test image not available")
         
-        # Convert to RGB if needed
-        if self.test_image.mode != 'RGB':
-            self.test_image = self.test_image.convert('RGB')
+        # Use the RGB conversion made once in setUpClass
+        test_image = self.test_image_rgb
         
         state_types = ["fixed", "multi", "multi_movement", "multi#f", "multi_movement#f"]
         
         for state_type in state_types:
             with self.subTest(state_type=state_type):
                 params = f"fname=test_{state_type}.png twidth=8 theight=16 states={state_type} htiles=1 vtiles=1 palettes=1"
-                result = gbstudio_anim_process(self.test_image, params)
+                result = gbstudio_anim_process(test_image, params)
                 
                 self.assertIsNotNone(result.extra_data)
                 json_data = result.extra_data
@@ -133,9 +135,8 @@ class TestSprPngToGBStudioAnimO1(unittest.TestCase):
         if not self.test_image:
             self.skipTest("Test image not available")
         
-        # Convert to RGB if needed
-        if self.test_image.mode != 'RGB':
-            self.test_image = self.test_image.convert('RGB')
+        # Use the RGB conversion made once in setUpClass
+        test_image = self.test_image_rgb
         
         # Test different tile sizes
         tile_configs = [
@@ -147,7 +148,7 @@ class TestSprPngToGBStudioAnimO1(unittest.TestCase):
         for twidth, theight, htiles, vtiles in tile_configs:
             with self.subTest(twidth=twidth, theight=theight, htiles=htiles, vtiles=vtiles):
                 params = f"fname=test_{twidth}x{theight}.png twidth={twidth} theight={theight} states=fixed htiles={htiles} vtiles={vtiles} palettes=1"
-                result = gbstudio_anim_process(self.test_image, params)
+                result = gbstudio_anim_process(test_image, params)
                 
                 self.assertIsNotNone(result.extra_data)
                 json_data = result.extra_data
@@ -158,6 +159,47 @@ class TestSprPngToGBStudioAnimO1(unittest.TestCase):
                 self.assertEqual(json_data["canvasWidth"], expected_canvas_width)
                 self.assertEqual(json_data["canvasHeight"], expected_canvas_height)
     
+    def _first_animation_frames(self, pixels, palettes="1"):
+        """Process an RGB pixel array as 8x16 frames and return the frames of the first animation."""
+        params = f"fname=test.png twidth=8 theight=16 states=fixed htiles=1 vtiles=1 palettes={palettes}"
+        result = gbstudio_anim_process(Image.fromarray(pixels, 'RGB'), params)
+        return result.extra_data["states"][0]["animations"][0]["frames"]
+
+    def test_empty_frame_ends_animation(self):
+        """Test that an all-green frame ends the animation."""
+        # Three 8x16 frames: red, all green, red
+        pixels = np.full((16, 24, 3), (0, 255, 0), dtype=np.uint8)
+        pixels[:, :8] = (255, 0, 0)
+        pixels[:, 16:] = (255, 0, 0)
+
+        frames = self._first_animation_frames(pixels)
+
+        # Only the frame before the empty one is kept
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]["tiles"][0]["sliceX"], 0)
+
+    def test_single_non_green_pixel_keeps_frame(self):
+        """Test that one non-green pixel is enough for a frame to count as not empty."""
+        pixels = np.full((16, 16, 3), (0, 255, 0), dtype=np.uint8)
+        pixels[:, :8] = (255, 0, 0)
+        pixels[15, 15] = (0, 254, 0)  # Bottom right pixel of the second frame
+
+        frames = self._first_animation_frames(pixels)
+
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[1]["tiles"][0]["sliceX"], 8)
+
+    def test_frame_outside_image_is_not_empty(self):
+        """Test that a frame reaching past the image border is kept even if its visible part is green."""
+        # Two layers stack two tile rows per frame, but the image only has one
+        pixels = np.full((16, 16, 3), (0, 255, 0), dtype=np.uint8)
+
+        frames = self._first_animation_frames(pixels, palettes="1,2")
+
+        # The part below the image reads as black padding, so no frame is empty
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(len(frames[0]["tiles"]), 2)
+
     def test_invalid_parameters(self):
         """Test handling of invalid parameters."""
         if not self.test_image:
@@ -199,19 +241,38 @@ class TestSprPngToGBStudioAnimO1(unittest.TestCase):
         # The function should process successfully with valid parameters
         self.assertIsInstance(result.extra_data, dict)
     
+    def test_tile_ids_are_unique_uuid4(self):
+        """Test that generated tile IDs are unique version 4 UUIDs."""
+        if not self.test_image:
+            self.skipTest("Test image not available")
+        
+        params = "fname=test.png twidth=8 theight=16 states=multi htiles=1 vtiles=1 palettes=1,2"
+        result = gbstudio_anim_process(self.test_image, params)
+        
+        tile_ids = [tile["id"]
+                    for state in result.extra_data["states"]
+                    for animation in state["animations"]
+                    for frame in animation["frames"]
+                    for tile in frame["tiles"]]
+        
+        self.assertGreater(len(tile_ids), 0)
+        self.assertEqual(len(tile_ids), len(set(tile_ids)))
+        for tile_id in tile_ids:
+            parsed = uuid.UUID(tile_id)
+            self.assertEqual(parsed.version, 4)
+            self.assertEqual(str(parsed), tile_id)
+    
     def test_compare_with_expected_output(self):
         """Compare generated output with expected test output."""
         if not self.test_image:
             self.skipTest("Test image not available")
         
-        expected_json_path = "input/test/project/sprites/chicken_fighter_full.gbsres"
-        if not os.path.exists(expected_json_path):
+        if not self.expected_data:
             self.skipTest("Expected reference file not available")
         
-        # Load expected output
-        with open(expected_json_path, 'r') as f:
-            expected_data = json.load(f)
-            
+        # Expected output, loaded once in setUpClass
+        expected_data = self.expected_data
+        
         # Generate actual output
         params = "fname=chicken_fighter_full.png chksum=TBD twidth=8 theight=16 states=multi_movement htiles=1 vtiles=1 palettes=2,1"
         result = gbstudio_anim_process(self.test_image, params)
@@ -1,7 +1,7 @@
 import unittest
-import tempfile
 import os
 from PIL import Image
+import numpy as np
 import sys
 
 # Add the project root to the path so we can import the modules
@@ -9,46 +9,70 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from algorithms.spr_rgb_to_3color_layers import process, _extract_color_triplets, _create_stacked_bands
 
+# Colors that the first, second and third triplet colors are mapped to
+MAPPED_COLORS = np.array([(224, 248, 207), (134, 192, 108), (7, 24, 33)], dtype=np.uint8)
+
+
+def _reference_stack(pixels, triplets, width, rem_height):
+    """Straightforward reference for the stacked color bands, used to cross-check `process`."""
+    src = pixels[8:8 + rem_height, :width, :3]
+    bands = []
+    for triplet in triplets:
+        band = np.full((rem_height, width, 3), (0, 255, 0), dtype=np.uint8)
+        # Paint c3 first and c1 last, so that col1 wins when a triplet repeats a color
+        for color, mapped_color in reversed(list(zip(triplet, MAPPED_COLORS))):
+            band[(src == color).all(axis=-1)] = mapped_color
+        bands.append(band)
+    return np.concatenate(bands) if bands else np.empty((0, width, 3), dtype=np.uint8)
+
 
 class TestSprRgbTo3ColorLayers(unittest.TestCase):
     """Comprehensive test cases for spr_rgb_to_3color_layers module."""
 
-    def setUp(self):
-        """Set up test fixtures before each test method."""
-        # Create a temporary directory for test files
-        self.test_dir = tempfile.mkdtemp()
-
-    def tearDown(self):
-        """Clean up after each test method."""
-        # Clean up temporary directory
-        import shutil
-        shutil.rmtree(self.test_dir)
+    # Triplet test images by (width, height, num_triplets), built once per test run
+    _triplet_images = {}
 
     def create_test_image_with_triplets(self, width=16, height=20, num_triplets=2):
         """Create a test image with proper color triplets in the first row."""
-        image = Image.new('RGB', (width, height), (0, 255, 0))  # Green background
-        
-        # Add color triplets to the first row
-        for i in range(num_triplets):
-            start_x = i * 4
-            if start_x + 3 < width:
-                # Set triplet colors
-                image.putpixel((start_x, 0), (255, 0, 0))      # Red
-                image.putpixel((start_x + 1, 0), (0, 0, 255))  # Blue
-                image.putpixel((start_x + 2, 0), (255, 255, 0)) # Yellow
-                image.putpixel((start_x + 3, 0), (0, 255, 0))   # Green break pixel
+        key = (width, height, num_triplets)
+        if key not in self._triplet_images:
+            self._triplet_images[key] = self._build_test_image_with_triplets(width, height, num_triplets)
+        # Each test gets its own copy, so a test can never change another test's fixture
+        return self._triplet_images[key].copy()
+
+    @staticmethod
+    def _build_test_image_with_triplets(width, height, num_triplets):
+        """Build the triplet test image, see `create_test_image_with_triplets`."""
+        pixels = np.full((height, width, 3), (0, 255, 0), dtype=np.uint8)  # Green background
         
-        # Add some test data in the remaining rows (after row 8)
-        for y in range(8, height):
-            for x in range(width):
-                if x % 4 == 0 and x + 3 < width:
-                    image.putpixel((x, y), (255, 0, 0))      # Red
-                elif x % 4 == 1 and x + 2 < width:
-                    image.putpixel((x, y), (0, 0, 255))      # Blue
-                elif x % 4 == 2 and x + 1 < width:
-                    image.putpixel((x, y), (255, 255, 0))    # Yellow
+        # Only complete groups of 4 pixels (triplet + break) fit in the width
+        groups = width // 4
         
-        return image
+        # Add color triplets to the first row: red, blue, yellow, green break pixel
+        triplet_pattern = np.array([(255, 0, 0), (0, 0, 255), (255, 255, 0), (0, 255, 0)], dtype=np.uint8)
+        num_complete = min(num_triplets, groups)
+        pixels[0, :num_complete * 4] = np.tile(triplet_pattern, (num_complete, 1))
+        
+        # Add some test data in the remaining rows (after row 8)
+        pixels[8:, 0:groups * 4:4] = (255, 0, 0)      # Red
+        pixels[8:, 1:groups * 4:4] = (0, 0, 255)      # Blue
+        pixels[8:, 2:groups * 4:4] = (255, 255, 0)    # Yellow
+        
+        return Image.fromarray(pixels, 'RGB')
+
+    @staticmethod
+    def create_test_image_with_one_triplet(width, height):
+        """Create a test image with a single color triplet and its break pixel in the first row."""
+        pixels = np.full((height, width, 3), (0, 255, 0), dtype=np.uint8)  # Green background
+        pixels[0, :4] = [(255, 0, 0), (0, 0, 255), (255, 255, 0), (0, 255, 0)]  # Red, blue, yellow, green break
+        return Image.fromarray(pixels, 'RGB')
+
+    @staticmethod
+    def create_test_image_without_triplets():
+        """Create an 8x16 test image whose first row is gray, so it holds no color triplets."""
+        pixels = np.full((16, 8, 3), (0, 255, 0), dtype=np.uint8)  # Green background
+        pixels[0] = (128, 128, 128)
+        return Image.fromarray(pixels, 'RGB')
 
     def test_process_basic_functionality(self):
         """Test basic process function with valid input."""
@@ -63,22 +87,27 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         # Should have correct dimensions (width same, height = rem_height * num_triplets)
         expected_height = (20 - 8) * 2  # (height - 8) * num_triplets
         self.assertEqual(result.size, (16, expected_height))
+        # Pixels should match the reference stacking
+        triplets = _extract_color_triplets(test_image, 16)
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(np.asarray(test_image), triplets, 16, 12)))
 
     def test_process_with_different_image_modes(self):
         """Test process function with different image modes."""
         # Test with RGBA mode
-        rgba_image = Image.new('RGBA', (16, 20), (0, 255, 0, 255))
-        # Add color triplets
-        for i in range(2):
-            start_x = i * 4
-            rgba_image.putpixel((start_x, 0), (255, 0, 0, 255))
-            rgba_image.putpixel((start_x + 1, 0), (0, 0, 255, 255))
-            rgba_image.putpixel((start_x + 2, 0), (255, 255, 0, 255))
-            rgba_image.putpixel((start_x + 3, 0), (0, 255, 0, 255))
+        pixels = np.full((20, 16, 4), (0, 255, 0, 255), dtype=np.uint8)
+        # Add two color triplets
+        triplet_row = pixels[0, :8]
+        triplet_row[0::4] = (255, 0, 0, 255)
+        triplet_row[1::4] = (0, 0, 255, 255)
+        triplet_row[2::4] = (255, 255, 0, 255)
+        triplet_row[3::4] = (0, 255, 0, 255)
+        rgba_image = Image.fromarray(pixels, 'RGBA')
         
         result = process(rgba_image)
         self.assertIsInstance(result, Image.Image)
         self.assertEqual(result.mode, 'RGB')
+        triplets = _extract_color_triplets(rgba_image.convert('RGB'), 16)
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(pixels, triplets, 16, 12)))
 
     def test_process_single_triplet(self):
         """Test process function with single color triplet."""
@@ -99,6 +128,8 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         self.assertIsInstance(result, Image.Image)
         expected_height = (24 - 8) * 3  # (height - 8) * num_triplets
         self.assertEqual(result.size, (20, expected_height))
+        triplets = _extract_color_triplets(test_image, 20)
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(np.asarray(test_image), triplets, 20, 16)))
 
     def test_process_color_mapping(self):
         """Test that colors are correctly mapped to the expected values."""
@@ -107,18 +138,12 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         result = process(test_image)
         
         # Check that the mapped colors are present in the result
-        mapped_colors = [(224, 248, 207), (134, 192, 108), (7, 24, 33)]
-        result_colors = set()
-        
-        for y in range(result.height):
-            for x in range(result.width):
-                pixel = result.getpixel((x, y))
-                if pixel != (0, 255, 0):  # Not background green
-                    result_colors.add(pixel)
+        result_pixels = np.asarray(result).reshape(-1, 3)
+        result_colors = {tuple(color) for color in np.unique(result_pixels, axis=0).tolist()}
         
         # Should contain the mapped colors
-        for mapped_color in mapped_colors:
-            self.assertIn(mapped_color, result_colors)
+        for mapped_color in MAPPED_COLORS.tolist():
+            self.assertIn(tuple(mapped_color), result_colors)
 
     def test_process_error_handling_invalid_image_type(self):
         """Test error handling for invalid image type."""
@@ -140,10 +165,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
     def test_process_error_handling_no_triplets(self):
         """Test error handling when no valid triplets are found."""
         # Create image with no valid triplets
-        no_triplets_image = Image.new('RGB', (8, 16), (0, 255, 0))
-        # Fill first row with non-triplet pattern
-        for x in range(8):
-            no_triplets_image.putpixel((x, 0), (128, 128, 128))
+        no_triplets_image = self.create_test_image_without_triplets()
         
         with self.assertRaises(ValueError) as context:
             process(no_triplets_image)
@@ -152,12 +174,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
 
     def test_process_error_handling_small_height(self):
         """Test error handling for image with height <= 8."""
-        small_height_image = Image.new('RGB', (8, 8), (0, 255, 0))
-        # Add one triplet
-        small_height_image.putpixel((0, 0), (255, 0, 0))
-        small_height_image.putpixel((1, 0), (0, 0, 255))
-        small_height_image.putpixel((2, 0), (255, 255, 0))
-        small_height_image.putpixel((3, 0), (0, 255, 0))
+        small_height_image = self.create_test_image_with_one_triplet(8, 8)
         
         with self.assertRaises(ValueError) as context:
             process(small_height_image)
@@ -176,10 +193,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
 
     def test_extract_color_triplets_no_triplets(self):
         """Test _extract_color_triplets function with no valid triplets."""
-        no_triplets_image = Image.new('RGB', (8, 16), (0, 255, 0))
-        # Fill first row with non-triplet pattern
-        for x in range(8):
-            no_triplets_image.putpixel((x, 0), (128, 128, 128))
+        no_triplets_image = self.create_test_image_without_triplets()
         
         triplets = _extract_color_triplets(no_triplets_image, 8)
         
@@ -221,6 +235,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         self.assertIsInstance(result, Image.Image)
         self.assertEqual(result.mode, 'RGB')
         self.assertEqual(result.size, (8, 16))  # width * (rem_height * num_triplets)
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(np.asarray(test_image), triplets, 8, 8)))
 
     def test_create_stacked_bands_color_mapping(self):
         """Test _create_stacked_bands function color mapping."""
@@ -240,15 +255,9 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         triplets = _extract_color_triplets(test_image, 4)
         result = _create_stacked_bands(test_image, triplets, 4, 4)
         
-        # Check that colors are mapped correctly
-        mapped_colors = [(224, 248, 207), (134, 192, 108), (7, 24, 33)]
-        
-        # Red should map to first color
-        self.assertEqual(result.getpixel((0, 0)), mapped_colors[0])
-        # Blue should map to second color
-        self.assertEqual(result.getpixel((1, 1)), mapped_colors[1])
-        # Yellow should map to third color
-        self.assertEqual(result.getpixel((2, 2)), mapped_colors[2])
+        # Red, blue and yellow on the diagonal should map to the first, second and third color
+        diagonal = np.asarray(result)[[0, 1, 2], [0, 1, 2]]
+        np.testing.assert_array_equal(diagonal, MAPPED_COLORS)
 
     def test_create_stacked_bands_empty_triplets(self):
         """Test _create_stacked_bands function with empty triplets list."""
@@ -262,12 +271,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
     def test_process_edge_case_minimum_dimensions(self):
         """Test process function with minimum valid dimensions."""
         # Minimum width (4) and minimum height (9)
-        min_image = Image.new('RGB', (4, 9), (0, 255, 0))
-        # Add one triplet
-        min_image.putpixel((0, 0), (255, 0, 0))
-        min_image.putpixel((1, 0), (0, 0, 255))
-        min_image.putpixel((2, 0), (255, 255, 0))
-        min_image.putpixel((3, 0), (0, 255, 0))
+        min_image = self.create_test_image_with_one_triplet(4, 9)
         
         result = process(min_image)
         
@@ -294,10 +298,8 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         
         self.assertIsInstance(result, Image.Image)
         # Check that the custom colors were mapped correctly
-        mapped_colors = [(224, 248, 207), (134, 192, 108), (7, 24, 33)]
-        self.assertEqual(result.getpixel((0, 0)), mapped_colors[0])
-        self.assertEqual(result.getpixel((1, 1)), mapped_colors[1])
-        self.assertEqual(result.getpixel((2, 2)), mapped_colors[2])
+        diagonal = np.asarray(result)[[0, 1, 2], [0, 1, 2]]
+        np.testing.assert_array_equal(diagonal, MAPPED_COLORS)
 
     def test_process_background_color_preservation(self):
         """Test that background green color is preserved in result."""
@@ -307,15 +309,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         
         # Check that background areas (non-matching pixels) are still green
         # Look for a pixel that should be background (not matching any triplet color)
-        background_found = False
-        for y in range(result.height):
-            for x in range(result.width):
-                pixel = result.getpixel((x, y))
-                if pixel == (0, 255, 0):  # Background green
-                    background_found = True
-                    break
-            if background_found:
-                break
+        background_found = (np.asarray(result) == (0, 255, 0)).all(axis=-1).any()
         
         self.assertTrue(background_found, "Background green color should be preserved in non-matching areas")
 
@@ -324,12 +318,12 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         test_image = self.create_test_image_with_triplets(8, 16, 1)
         
         # Should work with params parameter
-        result1 = process(test_image, "")
-        result2 = process(test_image, "some_params")
+        result = process(test_image, "some_params")
         
-        # Results should be identical
-        self.assertEqual(result1.size, result2.size)
-        self.assertEqual(result1.mode, result2.mode)
+        # Result should be the same as without params
+        triplets = _extract_color_triplets(test_image, 8)
+        self.assertEqual(result.mode, 'RGB')
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(np.asarray(test_image), triplets, 8, 8)))
 
     def test_process_large_image(self):
         """Test process function with larger image dimensions."""
@@ -340,6 +334,8 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         self.assertIsInstance(result, Image.Image)
         expected_height = (100 - 8) * 4  # (height - 8) * num_triplets
         self.assertEqual(result.size, (64, expected_height))
+        triplets = _extract_color_triplets(large_image, 64)
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(np.asarray(large_image), triplets, 64, 92)))
 
     def test_process_wide_image(self):
         """Test process function with wide image (many triplets)."""
@@ -350,15 +346,13 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
         self.assertIsInstance(result, Image.Image)
         expected_height = (20 - 8) * 8  # (height - 8) * num_triplets
         self.assertEqual(result.size, (40, expected_height))
+        triplets = _extract_color_triplets(wide_image, 40)
+        self.assertTrue(np.array_equal(np.asarray(result), _reference_stack(np.asarray(wide_image), triplets, 40, 12)))
 
     def test_extract_color_triplets_edge_cases(self):
         """Test _extract_color_triplets function with various edge cases."""
         # Test with exactly 4 pixels (one triplet)
-        small_image = Image.new('RGB', (4, 10), (0, 255, 0))
-        small_image.putpixel((0, 0), (255, 0, 0))
-        small_image.putpixel((1, 0), (0, 0, 255))
-        small_image.putpixel((2, 0), (255, 255, 0))
-        small_image.putpixel((3, 0), (0, 255, 0))
+        small_image = self.create_test_image_with_one_triplet(4, 10)
         
         triplets = _extract_color_triplets(small_image, 4)
         self.assertEqual(len(triplets), 1)
@@ -366,12 +360,7 @@ class TestSprRgbTo3ColorLayers(unittest.TestCase):
 
     def test_create_stacked_bands_different_heights(self):
         """Test _create_stacked_bands function with different remaining heights."""
-        test_image = Image.new('RGB', (8, 16), (0, 255, 0))
-        # Add one triplet
-        test_image.putpixel((0, 0), (255, 0, 0))
-        test_image.putpixel((1, 0), (0, 0, 255))
-        test_image.putpixel((2, 0), (255, 255, 0))
-        test_image.putpixel((3, 0), (0, 255, 0))
+        test_image = self.create_test_image_with_one_triplet(8, 16)
         
         triplets = _extract_color_triplets(test_image, 8)
         result = _create_stacked_bands(test_image, triplets, 8, 5)  # Different rem_height
@@ -0,0 +1,144 @@
+"""
+Test suite for tile_deduplication.py - duplicate tile removal across layers, frames and animations.
+
+Tests the tile deduplication functionality including:
+- First occurrence selection for duplicate tiles
+- Repeated tile positions
+- Black padding for tiles outside the image
+- Deduplication statistics
+- Invalid tile positions
+"""
+
+import unittest
+import io
+import contextlib
+import numpy as np
+from PIL import Image
+
+# Import the module to test
+from algorithms.tile_deduplication import process
+
+
+def _sprite(pixels, tiles):
+    """Create a processed sprite image with all tiles in a single frame."""
+    image = Image.fromarray(pixels, 'RGB')
+    image.extra_data = {'states': [{'animations': [{'frames': [{'tiles': tiles}]}]}]}
+    return image
+
+
+def _tile(tile_id, slice_x, slice_y=0):
+    """Create a tile entry as found in the GB Studio animation data."""
+    return {'id': tile_id, 'sliceX': slice_x, 'sliceY': slice_y}
+
+
+class TestTileDeduplication(unittest.TestCase):
+    """Test cases for tile_deduplication.py - duplicate tile removal."""
+
+    def test_duplicates_keep_earliest_tile(self):
+        """Test that duplicates at different positions reference the tile that comes first, not the leftmost one."""
+        pixels = np.zeros((16, 24, 3), dtype=np.uint8)
+        pixels[:, 16:] = (255, 0, 0)  # Third tile differs from the two black ones
+        tiles = [_tile('right', 8), _tile('left', 0), _tile('red', 16)]
+
+        result = process(_sprite(pixels, tiles))
+
+        self.assertEqual(tiles[0]['id'], 'right')
+        self.assertNotIn('_deduplicated', tiles[0])
+        self.assertEqual(tiles[1]['id'], 'right')
+        self.assertEqual(tiles[1]['sliceX'], 8)
+        self.assertEqual(tiles[1]['_original_id'], 'left')
+        self.assertEqual(tiles[1]['_original_sliceX'], 0)
+        self.assertTrue(tiles[1]['_deduplicated'])
+        self.assertNotIn('_deduplicated', tiles[2])
+        self.assertEqual(result.extra_data['deduplication']['tile_replacements'], {'left': 'right'})
+
+    def test_same_position_several_times(self):
+        """Test that tiles repeating one position all reference the first of them."""
+        pixels = np.zeros((16, 16, 3), dtype=np.uint8)
+        pixels[:, 8:] = (0, 0, 255)
+        tiles = [_tile('a', 8), _tile('b', 0), _tile('c', 8), _tile('d', 8)]
+
+        result = process(_sprite(pixels, tiles))
+
+        self.assertEqual([tile['id'] for tile in tiles], ['a', 'b', 'a', 'a'])
+        self.assertEqual(result.extra_data['deduplication']['tile_replacements'], {'c': 'a', 'd': 'a'})
+
+    def test_tiles_outside_image_are_black_padded(self):
+        """Test that tiles partly or fully outside the image compare as black-padded tiles."""
+        pixels = np.zeros((16, 12, 3), dtype=np.uint8)
+        pixels[:, :4] = (255, 255, 255)  # White left edge, black elsewhere
+        tiles = [
+            _tile('black', 4),          # Fully inside, all black
+            _tile('right_edge', 8),     # Black, with its right half padded
+            _tile('far_out', 10**7, 10**7),  # Fully outside, all padding
+            _tile('left_edge', -4),     # Padding next to the white edge
+            _tile('bottom_edge', 4, 8),  # Black, with its bottom half padded
+        ]
+
+        result = process(_sprite(pixels, tiles))
+
+        self.assertEqual([tile['id'] for tile in tiles], ['black', 'black', 'black', 'left_edge', 'black'])
+        deduplication = result.extra_data['deduplication']
+        self.assertEqual(deduplication['unique_tiles'], 2)
+        self.assertEqual(deduplication['duplicate_tiles'], 3)
+
+    def test_empty_states(self):
+        """Test deduplication of animation data without states."""
+        image = _sprite(np.zeros((16, 8, 3), dtype=np.uint8), [])
+        image.extra_data['states'] = []
+
+        result = process(image)
+
+        self.assertEqual(result.extra_data['deduplication'], {
+            'total_tiles': 0,
+            'unique_tiles': 0,
+            'duplicate_tiles': 0,
+            'memory_saved': 0,
+            'tile_replacements': {}
+        })
+
+    def test_non_numeric_slice_is_skipped(self):
+        """Test that a tile with a non-numeric sliceX is reported and left unchanged."""
+        pixels = np.zeros((16, 16, 3), dtype=np.uint8)
+        tiles = [_tile('a', 0), _tile('bad', 'left'), _tile('b', 8)]
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = process(_sprite(pixels, tiles))
+
+        self.assertIn("Warning: Could not process tile bad", output.getvalue())
+        self.assertEqual(tiles[1], _tile('bad', 'left'))
+        self.assertEqual(tiles[2]['id'], 'a')
+        deduplication = result.extra_data['deduplication']
+        self.assertEqual(deduplication['total_tiles'], 3)
+        self.assertEqual(deduplication['unique_tiles'], 1)
+        self.assertEqual(deduplication['duplicate_tiles'], 1)
+
+    def test_statistics(self):
+        """Test the deduplication statistics for tiles spread over states, animations and frames."""
+        pixels = np.zeros((16, 32, 3), dtype=np.uint8)
+        pixels[:, 8:16] = (255, 0, 0)
+        pixels[:, 16:24] = (255, 0, 0)
+        pixels[:, 24:, 1] = np.arange(16, dtype=np.uint8)[:, None]  # Green gradient
+        image = Image.fromarray(pixels, 'RGB')
+        image.extra_data = {'states': [
+            {'animations': [
+                {'frames': [{'tiles': [_tile('t1', 0), _tile('t2', 8)]}, {'tiles': [_tile('t3', 16)]}]},
+                {'frames': [{'tiles': [_tile('t4', 24)]}]},
+            ]},
+            {'animations': [{'frames': [{'tiles': [_tile('t5', 0), _tile('t6', 24), _tile('t7', 8)]}]}]},
+        ]}
+
+        result = process(image)
+
+        self.assertEqual(result.extra_data['deduplication'], {
+            'total_tiles': 7,
+            'unique_tiles': 3,
+            'duplicate_tiles': 4,
+            'memory_saved': 4,
+            'tile_replacements': {'t3': 't2', 't5': 't1', 't6': 't4', 't7': 't2'}
+        })
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)